@@ -0,0 +1,59 @@
+"""
+Fake Passport API knowing every passport, with configurable latency and errors.
+"""
+from typing import Optional
+import asyncio
+import random
+
+from aiohttp import web
+
+
+# Names of every passport; bookings of the load test send them.
+FIRST_NAME = "Load"
+LAST_NAME = "Tester"
+
+
+class FakePassportAPI:
+    """Serve GET /passport on a local port.
+
+    Each answer is delayed by ``latency`` seconds plus up to ``jitter`` more,
+    and a share ``error_rate`` of them is a 503.
+    """
+
+    def __init__(
+        self, latency: float, jitter: float = 0.0, error_rate: float = 0.0
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.rng = random.Random(0)
+        self.runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/passport", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.rng.random() < self.error_rate:
+            return web.Response(status=503, text="injected failure")
+
+        passport_id = (await request.json())["passport_id"]
+        return web.json_response(
+            {"passport_id": passport_id, "first_name": FIRST_NAME, "last_name": LAST_NAME}
+        )
@@ -0,0 +1,287 @@
+"""
+Load test of the API served in-process against a fake Passport API.
+
+Seeds scratch flights at DATABASE_URL, serves the app with uvicorn in a
+background thread, sends a mix of list and booking calls at --rate calls per
+second for --duration seconds, then deletes the scratch data and writes the
+throughput and p50/p95/p99 latency of each operation to --output. Exits with 1
+if a --max-* threshold is exceeded.
+
+    python -m benchmarks.loadtest [--rate 100] [--duration 30] [--output loadtest.json]
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import aiohttp
+import uvicorn
+from sqlalchemy import delete, insert
+
+from earnin_airline import passport
+from earnin_airline.app import app
+from earnin_airline.db import (
+    DATABASE_MODE,
+    CustomerRecord,
+    DB,
+    FlightRecord,
+    PassengerRecord,
+)
+
+from .passport_server import FakePassportAPI
+from .workload import (
+    DEFAULT_MIX,
+    PASSPORT_PREFIX,
+    Workload,
+    drive,
+    parse_mix,
+    summarize,
+)
+
+
+# Scratch flights are LOAD0001, LOAD0002 and so on.
+FLIGHT_PREFIX = "LOAD"
+
+
+class AppServer:
+    """The API served by uvicorn in a thread with its own event loop, so the
+    load generator does not share a loop with it."""
+
+    def __init__(self) -> None:
+        self.server: Optional[uvicorn.Server] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, timeout: float = 30) -> str:
+        config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("The API did not start")
+            time.sleep(0.05)
+
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def stop(self) -> None:
+        if self.server and self.thread:
+            self.server.should_exit = True
+            self.thread.join()
+
+
+def seed_flights(db: DB, count: int) -> List[str]:
+    flight_ids = [f"{FLIGHT_PREFIX}{index:04d}" for index in range(1, count + 1)]
+    departure = datetime(2030, 1, 1, 9)
+    with db.session() as session:
+        session.execute(
+            insert(FlightRecord),
+            [
+                {
+                    "id": flight_id,
+                    "departure_time": departure + timedelta(hours=index),
+                    "arrival_time": departure + timedelta(hours=index + 12),
+                    "departure_airport": "LHR",
+                    "arrival_airport": "BKK",
+                    "departure_timezone": "Europe/London",
+                    "arrival_timezone": "Asia/Bangkok",
+                }
+                for index, flight_id in enumerate(flight_ids)
+            ],
+        )
+        session.commit()
+
+    return flight_ids
+
+
+def clean_up(db: DB) -> None:
+    with db.session() as session:
+        session.execute(
+            delete(PassengerRecord).where(
+                PassengerRecord.flight_id.like(f"{FLIGHT_PREFIX}%")
+            )
+        )
+        session.execute(
+            delete(CustomerRecord).where(
+                CustomerRecord.passport_id.like(f"{PASSPORT_PREFIX}%")
+            )
+        )
+        session.execute(
+            delete(FlightRecord).where(FlightRecord.id.like(f"{FLIGHT_PREFIX}%"))
+        )
+        session.commit()
+
+
+async def run_workload(
+    app_url: str,
+    flight_ids: List[str],
+    rate: float,
+    duration: float,
+    warmup: float,
+    mix: Dict[str, float],
+    max_in_flight: int,
+    passport_api: FakePassportAPI,
+) -> dict:
+    passport.PASSPORT_API_URL = await passport_api.start()
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as client:
+            workload = Workload(client, app_url, flight_ids, mix)
+            if warmup:
+                await drive(workload, rate, warmup, max_in_flight)
+
+            started = time.perf_counter()
+            samples, skipped = await drive(workload, rate, duration, max_in_flight)
+            seconds = time.perf_counter() - started
+    finally:
+        await passport_api.stop()
+
+    return {
+        "seconds": round(seconds, 3),
+        "skipped": skipped,
+        "passport_api_requests": passport_api.requests,
+        "total": summarize(samples, seconds),
+        "operations": {
+            operation: summarize(
+                [sample for sample in samples if sample.operation == operation],
+                seconds,
+            )
+            for operation in sorted({sample.operation for sample in samples})
+        },
+    }
+
+
+def run(
+    rate: float = 100,
+    duration: float = 30,
+    warmup: float = 2,
+    mix: Optional[Dict[str, float]] = None,
+    flights: int = 10,
+    max_in_flight: int = 500,
+    passport_latency: float = 0.02,
+    passport_jitter: float = 0.01,
+    passport_error_rate: float = 0.0,
+) -> dict:
+    """Run a load test and return its report."""
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    settings = {
+        "rate": rate,
+        "duration": duration,
+        "warmup": warmup,
+        "mix": mix or DEFAULT_MIX,
+        "flights": flights,
+        "max_in_flight": max_in_flight,
+        "passport_latency": passport_latency,
+        "passport_jitter": passport_jitter,
+        "passport_error_rate": passport_error_rate,
+        "database_mode": DATABASE_MODE,
+    }
+    db = DB()
+    clean_up(db)
+    flight_ids = seed_flights(db, flights)
+    # Started after seeding, so the flight catalog loads the scratch flights.
+    app_server = AppServer()
+    try:
+        app_url = app_server.start()
+        result = asyncio.run(
+            run_workload(
+                app_url,
+                flight_ids,
+                rate,
+                duration,
+                warmup,
+                settings["mix"],
+                max_in_flight,
+                FakePassportAPI(passport_latency, passport_jitter, passport_error_rate),
+            )
+        )
+    finally:
+        app_server.stop()
+        clean_up(db)
+        db.dispose()
+
+    return {
+        "started_at": started_at,
+        "settings": settings,
+        **result,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'operation':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>8}"
+        f" {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    rows = [*report["operations"].items(), ("total", report["total"])]
+    for operation, summary in rows:
+        print(
+            f"{operation:<16} {summary['requests']:>8} {summary['throughput']:>8.1f}"
+            f" {summary.get('p50_ms', 0):>8.1f} {summary.get('p95_ms', 0):>8.1f}"
+            f" {summary.get('p99_ms', 0):>8.1f} {summary['errors']:>6}"
+        )
+    if report["skipped"]:
+        print(f"{report['skipped']} calls skipped: --max-in-flight was reached")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="calls per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument(
+        "--warmup", type=float, default=2, help="seconds of load before measuring"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="weights of the operations, e.g. list_flights=3,create_booking=1",
+    )
+    parser.add_argument("--flights", type=int, default=10)
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument(
+        "--passport-latency", type=float, default=0.02, help="seconds per lookup"
+    )
+    parser.add_argument(
+        "--passport-jitter", type=float, default=0.01, help="extra random seconds"
+    )
+    parser.add_argument("--passport-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="loadtest.json")
+    parser.add_argument("--max-p99-ms", type=float, help="fail above this total p99")
+    parser.add_argument(
+        "--max-error-rate", type=float, help="fail above this share of errors"
+    )
+    args = parser.parse_args()
+
+    report = run(
+        args.rate,
+        args.duration,
+        args.warmup,
+        args.mix,
+        args.flights,
+        args.max_in_flight,
+        args.passport_latency,
+        args.passport_jitter,
+        args.passport_error_rate,
+    )
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print_report(report)
+    print(f"Report written to {args.output}")
+
+    total = report["total"]
+    failures = []
+    if args.max_p99_ms is not None and total.get("p99_ms", 0) > args.max_p99_ms:
+        failures.append(f"p99 {total['p99_ms']} ms > {args.max_p99_ms} ms")
+    if (
+        args.max_error_rate is not None
+        and total["errors"] > args.max_error_rate * max(total["requests"], 1)
+    ):
+        failures.append(f"{total['errors']} errors in {total['requests']} requests")
+    if failures:
+        sys.exit("error: " + "; ".join(failures))
@@ -0,0 +1,224 @@
+"""
+Mixed workload sent at a target rate, and the summary of its latencies.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import itertools
+import math
+import random
+
+import aiohttp
+
+from .passport_server import FIRST_NAME, LAST_NAME
+
+
+OPERATIONS = (
+    "list_flights",
+    "list_passengers",
+    "create_booking",
+    "update_booking",
+    "delete_booking",
+)
+DEFAULT_MIX = {
+    "list_flights": 30,
+    "list_passengers": 40,
+    "create_booking": 15,
+    "update_booking": 10,
+    "delete_booking": 5,
+}
+
+# Passport IDs of the customers booked by the load test start with this.
+PASSPORT_PREFIX = "LT"
+
+PERCENTILES = (50, 95, 99)
+
+
+class Booking(NamedTuple):
+    flight_id: str
+    customer_id: int
+    passport_id: str
+
+
+class Call(NamedTuple):
+    operation: str
+    method: str
+    path: str
+    body: Optional[dict]
+
+
+class Sample(NamedTuple):
+    operation: str
+    # 0 if no response was received
+    status: int
+    seconds: float
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse weights like ``list_flights=3,create_booking=1``."""
+    mix = {}
+    for item in text.split(","):
+        operation, _, weight = item.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(
+                f"Unknown operation {operation!r}, expected one of {', '.join(OPERATIONS)}"
+            )
+        mix[operation] = float(weight)
+
+    if not any(mix.values()):
+        raise ValueError("The mix has no operation with a positive weight")
+
+    return mix
+
+
+class Workload:
+    """Calls of the API picked at random by weight.
+
+    Bookings it creates are remembered for the updates and deletes, which
+    create a booking instead while there is none.
+    """
+
+    def __init__(
+        self,
+        client: aiohttp.ClientSession,
+        base_url: str,
+        flight_ids: Sequence[str],
+        mix: Dict[str, float],
+        seed: int = 0,
+    ) -> None:
+        self.client = client
+        self.base_url = base_url
+        self.flight_ids = list(flight_ids)
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.bookings: List[Booking] = []
+        self.passport_ids = (f"{PASSPORT_PREFIX}{n:08d}" for n in itertools.count())
+        self.rng = random.Random(seed)
+
+    def next_call(self) -> Call:
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        flight_id = self.rng.choice(self.flight_ids)
+        if operation == "list_flights":
+            return Call(operation, "GET", "/flights?limit=100", None)
+        if operation == "list_passengers":
+            return Call(operation, "GET", f"/flights/{flight_id}/passengers", None)
+        if operation == "update_booking" and self.bookings:
+            booking = self.rng.choice(self.bookings)
+            return Call(
+                operation,
+                "PUT",
+                f"/flights/{booking.flight_id}/passengers/{booking.customer_id}",
+                _passenger(booking.passport_id),
+            )
+        if operation == "delete_booking" and self.bookings:
+            # Taken now, so no other call updates or deletes it meanwhile.
+            booking = self.bookings.pop(self.rng.randrange(len(self.bookings)))
+            return Call(
+                operation,
+                "DELETE",
+                f"/flights/{booking.flight_id}/passengers/{booking.customer_id}",
+                None,
+            )
+
+        return Call(
+            "create_booking",
+            "POST",
+            f"/flights/{flight_id}/passengers",
+            _passenger(next(self.passport_ids)),
+        )
+
+    async def send(self, call: Call) -> int:
+        async with self.client.request(
+            call.method, self.base_url + call.path, json=call.body
+        ) as response:
+            if call.operation == "create_booking" and response.status == 200:
+                passenger = await response.json()
+                self.bookings.append(
+                    Booking(
+                        passenger["flight_id"],
+                        passenger["customer_id"],
+                        passenger["passport_id"],
+                    )
+                )
+            else:
+                await response.read()
+
+            return response.status
+
+
+def _passenger(passport_id: str) -> dict:
+    return {"passport_id": passport_id, "first_name": FIRST_NAME, "last_name": LAST_NAME}
+
+
+async def drive(
+    workload: Workload, rate: float, duration: float, max_in_flight: int
+) -> Tuple[List[Sample], int]:
+    """Start calls at ``rate`` per second for ``duration`` seconds.
+
+    Latency is measured from when a call was due rather than sent, so a
+    stalled client does not hide a slow server (coordinated omission). Calls
+    due while ``max_in_flight`` are outstanding are skipped and counted.
+
+    Returns the samples and the number of skipped calls.
+    """
+    loop = asyncio.get_running_loop()
+    samples: List[Sample] = []
+    tasks = set()
+    skipped = 0
+
+    async def run(call: Call, due: float) -> None:
+        try:
+            status = await workload.send(call)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = 0
+        samples.append(Sample(call.operation, status, loop.time() - due))
+
+    started = loop.time()
+    for index in itertools.count():
+        due = started + index / rate
+        if due - started >= duration:
+            break
+
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if len(tasks) >= max_in_flight:
+            skipped += 1
+            continue
+
+        task = asyncio.create_task(run(workload.next_call(), due))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    return samples, skipped
+
+
+def percentile(ordered: Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    index = math.ceil(percent / 100 * len(ordered)) - 1
+    return ordered[max(index, 0)]
+
+
+def summarize(samples: Sequence[Sample], seconds: float) -> dict:
+    """Throughput, errors, statuses and latency percentiles in milliseconds."""
+    latencies = sorted(sample.seconds for sample in samples)
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+
+    summary = {
+        "requests": len(samples),
+        "throughput": round(len(samples) / seconds, 2),
+        # No response or a server error; 4xx are expected, e.g. for a
+        # booking deleted while being updated.
+        "errors": sum(1 for sample in samples if not 0 < sample.status < 500),
+        "statuses": dict(sorted(statuses.items())),
+    }
+    if latencies:
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(percentile(latencies, percent) * 1000, 2)
+        summary["max_ms"] = round(latencies[-1] * 1000, 2)
+
+    return summary
@@ -0,0 +1,115 @@
+"""
+Benchmark of reading a flight's passengers as ORM entities versus row projections.
+
+Books --rows synthetic passengers on a scratch flight inside a transaction that
+is rolled back at the end, then reads them both ways and prints the time per
+request and the memory held per row. Needs the schema of db/schema.sql at
+DATABASE_URL.
+
+    python -m benchmarks.row_projection_bench [--rows 10000] [--repeat 5]
+"""
+from datetime import datetime
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from earnin_airline.db import (
+    CustomerRecord,
+    DB,
+    FlightRecord,
+    PassengerRecord,
+    PassengerRow,
+    _list_passengers_stmt,
+)
+
+
+FLIGHT_ID = "BENCH01"
+
+
+def load_entities(session: Session):
+    # The query list_passengers ran before it switched to row projections.
+    stmt = (
+        select(PassengerRecord)
+        .options(joinedload(PassengerRecord.customer))
+        .where(PassengerRecord.flight_id == FLIGHT_ID)
+    )
+    return list(session.scalars(stmt))
+
+
+def load_rows(session: Session):
+    stmt = _list_passengers_stmt(FLIGHT_ID, None, None)
+    return list(map(PassengerRow._make, session.execute(stmt)))
+
+
+def seed(session: Session, rows: int) -> None:
+    session.add(
+        FlightRecord(
+            id=FLIGHT_ID,
+            departure_time=datetime(2024, 12, 1, 10),
+            arrival_time=datetime(2024, 12, 1, 14),
+            departure_airport="LHR",
+            arrival_airport="BKK",
+            departure_timezone="Europe/London",
+            arrival_timezone="Asia/Bangkok",
+        )
+    )
+    customer_ids = session.scalars(
+        insert(CustomerRecord).returning(CustomerRecord.id),
+        [
+            {
+                "passport_id": f"BENCH{index:09d}",
+                "first_name": f"First{index}",
+                "last_name": f"Last{index}",
+            }
+            for index in range(rows)
+        ],
+    ).all()
+    session.execute(
+        insert(PassengerRecord),
+        [{"flight_id": FLIGHT_ID, "customer_id": customer_id} for customer_id in customer_ids],
+    )
+    session.flush()
+
+
+def measure(session: Session, load, repeat: int):
+    """Return the best seconds per call and the bytes held by one result."""
+    best = float("inf")
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        load(session)
+        best = min(best, time.perf_counter() - started)
+
+    session.expunge_all()
+    tracemalloc.start()
+    result = load(session)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, held, len(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = DB()
+    with db.session() as session:
+        seed(session, args.rows)
+        try:
+            for name, load in [("ORM entities", load_entities), ("row projection", load_rows)]:
+                seconds, held, count = measure(session, load, args.repeat)
+                print(
+                    f"{name:<16} {seconds * 1000:>9.1f} ms/request"
+                    f" {held / count:>9.0f} bytes/row"
+                )
+        finally:
+            session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the timezone conversion used by GET /flights.
+
+Converts the departure and arrival times of a synthetic schedule and prints
+rows/second for the original per-call implementation, the cached per-row
+apply_timezone and the bulk apply_timezone_bulk.
+
+    python -m benchmarks.timezone_bench [--rows 100000] [--repeat 5]
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import argparse
+import random
+import time
+
+from earnin_airline import timezone
+
+
+ZONES = [
+    "Europe/London",
+    "Asia/Bangkok",
+    "America/New_York",
+    "Asia/Tokyo",
+    "Australia/Sydney",
+    "Europe/Paris",
+    "Asia/Dubai",
+    "America/Los_Angeles",
+]
+
+
+def original_apply_timezone(datetime_as_utc: datetime, zone_name: str):
+    # The implementation before zones were cached, kept as the baseline.
+    fixed_tz = datetime_as_utc.replace(tzinfo=ZoneInfo("UTC"))
+    return fixed_tz.astimezone(ZoneInfo(zone_name))
+
+
+def make_schedule(rows: int):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    departures = [start + timedelta(minutes=rng.randrange(525600)) for _ in range(rows)]
+    arrivals = [departure + timedelta(hours=rng.randrange(1, 15)) for departure in departures]
+    departure_zones = [rng.choice(ZONES) for _ in range(rows)]
+    arrival_zones = [rng.choice(ZONES) for _ in range(rows)]
+    return departures, departure_zones, arrivals, arrival_zones
+
+
+def per_row(apply):
+    def convert(departures, departure_zones, arrivals, arrival_zones):
+        return (
+            [apply(value, zone) for value, zone in zip(departures, departure_zones)],
+            [apply(value, zone) for value, zone in zip(arrivals, arrival_zones)],
+        )
+
+    return convert
+
+
+def bulk(departures, departure_zones, arrivals, arrival_zones):
+    return (
+        timezone.apply_timezone_bulk(departures, departure_zones),
+        timezone.apply_timezone_bulk(arrivals, arrival_zones),
+    )
+
+
+def measure(convert, schedule, repeat: int) -> float:
+    """Return the best rows/second over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        convert(*schedule)
+        best = min(best, time.perf_counter() - started)
+
+    return len(schedule[0]) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    schedule = make_schedule(args.rows)
+    expected = per_row(original_apply_timezone)(*schedule)
+    for converted, original in zip(bulk(*schedule), expected):
+        assert [(value, value.tzinfo) for value in converted] == [
+            (value, value.tzinfo) for value in original
+        ], "bulk conversion differs from the original"
+
+    baseline = measure(per_row(original_apply_timezone), schedule, args.repeat)
+    for name, convert in [
+        ("original apply_timezone", per_row(original_apply_timezone)),
+        ("cached apply_timezone", per_row(timezone.apply_timezone)),
+        ("apply_timezone_bulk", bulk),
+    ]:
+        rows_per_second = measure(convert, schedule, args.repeat)
+        print(
+            f"{name:<24} {rows_per_second:>12,.0f} rows/s"
+            f"  x{rows_per_second / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,42 @@ CREATE TABLE IF NOT EXISTS flights (
     arrival_airport VARCHAR(3) NOT NULL,
     departure_timezone VARCHAR(30) NOT NULL,
     arrival_timezone VARCHAR(30) NOT NULL,
+    -- Bumped whenever the passenger list of the flight changes; used for ETags.
+    passengers_version BIGINT NOT NULL DEFAULT 0,
+    -- Number of rows in passengers for the flight, kept by the same triggers.
+    passenger_count INT NOT NULL DEFAULT 0,
     PRIMARY KEY (id)
 );
 
+-- Databases created before passengers_version.
+ALTER TABLE flights ADD COLUMN IF NOT EXISTS passengers_version BIGINT NOT NULL DEFAULT 0;
+
+-- Indexes of GET /flights/search: equality on the airports, then the
+-- departure time range and the (departure_time, id) keyset order.
+CREATE INDEX IF NOT EXISTS flights__route_departure_time_idx
+    ON flights (departure_airport, arrival_airport, departure_time, id);
+CREATE INDEX IF NOT EXISTS flights__departure_airport_departure_time_idx
+    ON flights (departure_airport, departure_time, id);
+CREATE INDEX IF NOT EXISTS flights__arrival_airport_departure_time_idx
+    ON flights (arrival_airport, departure_time, id);
+
+-- Tells the API workers to reload their in-memory flight catalog.
+CREATE OR REPLACE FUNCTION notify_flights_changed() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('flights_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only columns served by the catalog, so bumping passengers_version or
+-- passenger_count does not trigger a reload.
+CREATE OR REPLACE TRIGGER flights_changed
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF
+        id, departure_time, arrival_time, departure_airport, arrival_airport,
+        departure_timezone, arrival_timezone
+    ON flights
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flights_changed();
+
 
 CREATE TABLE IF NOT EXISTS customers (
     id SERIAL PRIMARY KEY,
@@ -27,6 +60,120 @@ CREATE TABLE IF NOT EXISTS passengers (
     PRIMARY KEY (flight_id, customer_id)
 );
 
+-- Flights of a customer, and the passengers_version bump of customers_updated.
+CREATE INDEX IF NOT EXISTS passengers__customer_id_idx ON passengers (customer_id);
+
+-- Databases created before passenger_count: add it and count the bookings
+-- already made, before the triggers below start adjusting it. Only done when
+-- the column is added, with bookings blocked so none is left out of the count.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM information_schema.columns
+        WHERE table_schema = current_schema()
+            AND table_name = 'flights'
+            AND column_name = 'passenger_count'
+    ) THEN
+        LOCK TABLE passengers IN SHARE MODE;
+        ALTER TABLE flights ADD COLUMN passenger_count INT NOT NULL DEFAULT 0;
+        UPDATE flights f SET passenger_count = (
+            SELECT count(*) FROM passengers p WHERE p.flight_id = f.id
+        );
+    END IF;
+END;
+$$;
+
+-- Bump passengers_version and adjust passenger_count of every flight whose
+-- passenger list a statement changed. Statement-level with transition tables,
+-- so a multi-row booking updates each flight once. The row lock taken by the
+-- UPDATE serializes concurrent bookings of a flight, keeping the count exact.
+CREATE OR REPLACE FUNCTION bump_passengers_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE flights SET
+            passengers_version = passengers_version + 1,
+            passenger_count = passenger_count + changed.delta
+        FROM (
+            SELECT flight_id, count(*) AS delta FROM new_passengers GROUP BY flight_id
+        ) changed
+        WHERE flights.id = changed.flight_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE flights SET
+            passengers_version = passengers_version + 1,
+            passenger_count = passenger_count - changed.delta
+        FROM (
+            SELECT flight_id, count(*) AS delta FROM old_passengers GROUP BY flight_id
+        ) changed
+        WHERE flights.id = changed.flight_id;
+    ELSE
+        UPDATE flights SET
+            passengers_version = passengers_version + 1,
+            passenger_count = passenger_count + changed.delta
+        FROM (
+            SELECT flight_id, sum(delta) AS delta FROM (
+                SELECT flight_id, 1 AS delta FROM new_passengers
+                UNION ALL SELECT flight_id, -1 AS delta FROM old_passengers
+            ) moved
+            GROUP BY flight_id
+        ) changed
+        WHERE flights.id = changed.flight_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER passengers_inserted
+    AFTER INSERT ON passengers REFERENCING NEW TABLE AS new_passengers
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_passengers_version();
+
+CREATE OR REPLACE TRIGGER passengers_deleted
+    AFTER DELETE ON passengers REFERENCING OLD TABLE AS old_passengers
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_passengers_version();
+
+CREATE OR REPLACE TRIGGER passengers_updated
+    AFTER UPDATE ON passengers
+    REFERENCING OLD TABLE AS old_passengers NEW TABLE AS new_passengers
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_passengers_version();
+
+-- Passenger lists show customer details, so changing them bumps every flight
+-- the customer is booked on.
+CREATE OR REPLACE FUNCTION bump_customer_passengers_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE flights SET passengers_version = passengers_version + 1
+    WHERE id IN (SELECT flight_id FROM passengers WHERE customer_id = NEW.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER customers_updated
+    AFTER UPDATE ON customers
+    FOR EACH ROW
+    WHEN (
+        OLD.passport_id IS DISTINCT FROM NEW.passport_id
+        OR OLD.first_name IS DISTINCT FROM NEW.first_name
+        OR OLD.last_name IS DISTINCT FROM NEW.last_name
+    )
+    EXECUTE FUNCTION bump_customer_passengers_version();
+
+-- Responses of booking writes replayed for retries with the same Idempotency-Key.
+-- Expired rows are deleted periodically by the API.
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    -- Hash of the method, path and body the key was first used with.
+    fingerprint VARCHAR(40) NOT NULL,
+    -- Both NULL while the first request holds the key and runs the write.
+    status_code INT,
+    body TEXT,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Tables created before keys could be reserved.
+ALTER TABLE idempotency_keys
+    ALTER COLUMN status_code DROP NOT NULL,
+    ALTER COLUMN body DROP NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idempotency_keys__expires_at_idx ON idempotency_keys (expires_at);
+
 -- Test flights with IDs matching test scenario numbers
 -- Tests 1, 2, 5, 6, 7: Booking operations (LHR -> BKK, different timezones)
 INSERT INTO flights VALUES('AA001', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
@@ -37,4 +184,14 @@ INSERT INTO flights VALUES('AA007', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00
 -- Test 3: Different timezones (LHR -> BKK, different timezones)
 INSERT INTO flights VALUES('AA003', '2024-12-01T10:00:00Z', '2024-12-01T18:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
 -- Test 4: Same timezone (DMK -> BKK, both Asia/Bangkok)
-INSERT INTO flights VALUES('AA004', '2024-12-01T08:00:00Z', '2024-12-01T10:00:00Z', 'DMK', 'BKK', 'Asia/Bangkok', 'Asia/Bangkok');
\ No newline at end of file
+INSERT INTO flights VALUES('AA004', '2024-12-01T08:00:00Z', '2024-12-01T10:00:00Z', 'DMK', 'BKK', 'Asia/Bangkok', 'Asia/Bangkok');
+-- Test 8: Batch booking (LHR -> BKK, different timezones)
+INSERT INTO flights VALUES('AA008', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
+-- Test 9: Paginated passenger list (LHR -> BKK, different timezones)
+INSERT INTO flights VALUES('AA009', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
+-- Test 11: Conditional GET of the passenger list (LHR -> BKK, different timezones)
+INSERT INTO flights VALUES('AA011', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
+-- Test 12: Idempotent booking writes (LHR -> BKK, different timezones)
+INSERT INTO flights VALUES('AA012', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
+-- Test 14: Flight stats (LHR -> BKK, different timezones)
+INSERT INTO flights VALUES('AA014', '2024-12-01T10:00:00Z', '2024-12-01T14:00:00Z', 'LHR', 'BKK', 'Europe/London', 'Asia/Bangkok');
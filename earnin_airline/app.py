@@ -1,11 +1,60 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Literal, Optional, Tuple
+import asyncio
+import os
 
-from . import dto, timezone
-from .passport import get_passport_detail
-from .db import get_db, EntityNotFound
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-app = FastAPI()
+from . import dto, metrics, passport, profiling, serialization
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursor,
+    decode_cursor,
+    paginate,
+)
+from .passport import PassportAPIError, get_passport_detail
+from .catalog import FLIGHT_CATALOG_ENABLED, FlightCatalog
+from .db import get_db, EntityAlreadyExists, EntityNotFound
+from .etag import make_etag, matches_if_none_match
+from .idempotency import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+    fingerprint,
+)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Max passport lookups in flight at once for a single batch booking.
+BATCH_PASSPORT_CONCURRENCY = int(os.getenv("BATCH_PASSPORT_CONCURRENCY", "20"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    passport.get_session()
+    if FLIGHT_CATALOG_ENABLED:
+        await catalog.start()
+    await idempotency.start()
+    yield
+    await idempotency.stop()
+    await catalog.stop()
+    await passport.close_session()
+    await db.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
 db = get_db()
+catalog = FlightCatalog(db)
+idempotency = IdempotencyStore(db)
 
 
 @app.get("/")
@@ -13,75 +62,356 @@ async def root():
     return {"service": "api", "healthy": True}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    content, media_type = metrics.render()
+    return Response(content=content, media_type=media_type)
+
+
+@app.get("/stats/passport-cache")
+async def passport_cache_stats():
+    return passport.passport_cache_stats()
+
+
+@app.get("/stats/passport-api")
+async def passport_api_stats():
+    return passport.passport_api_stats()
+
+
+@app.get("/stats/db-replicas")
+async def db_replica_stats():
+    return db.replicas.stats()
+
+
 @app.get("/flights")
-async def list_flight() -> dto.ListFlightsResponse:
-    records = db.list_flights()
-    return dto.ListFlightsResponse(
-        flights=[
-            dto.FlightResponse(
-                id=record.id,
-                departure_time=timezone.apply_timezone(
-                    record.departure_time, record.departure_timezone
-                ),
-                arrival_time=timezone.apply_timezone(
-                    record.arrival_time, record.arrival_timezone
-                ),
-                departure_airport=record.departure_airport,
-                arrival_airport=record.arrival_airport,
+async def list_flight(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dto.ListFlightsResponse:
+    after = None
+    if cursor:
+        (after,) = parse_cursor(cursor, str)
+
+    etag = None
+    if catalog.loaded:
+        etag = make_etag(catalog.version, limit, cursor, wants_ndjson(request))
+        if matches_if_none_match(request, etag):
+            return negotiated(not_modified(etag))
+
+    if wants_ndjson(request):
+        return negotiated(
+            ndjson_response(
+                catalog.stream_flights(after), serialization.flights_to_json, etag
             )
-            for record in records
-        ],
+        )
+
+    records, next_cursor = paginate(
+        await catalog.list_flights(limit=limit + 1, after=after),
+        limit,
+        key=lambda record: [record.id],
     )
+    return negotiated(
+        json_response(
+            {
+                "flights": serialization.flights_to_json(records),
+                "next_cursor": next_cursor,
+            },
+            etag,
+        )
+    )
+
+
+@app.get("/flights/search")
+async def search_flights(
+    departure_airport: Optional[str] = Query(None, min_length=3, max_length=3),
+    arrival_airport: Optional[str] = Query(None, min_length=3, max_length=3),
+    departure_from: Optional[datetime] = None,
+    departure_to: Optional[datetime] = None,
+    time_zone: Literal["utc", "local"] = "utc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dto.ListFlightsResponse:
+    """Flights by airport, departing in ``[departure_from, departure_to)``.
+
+    With ``time_zone=local`` the window is wall-clock time at the departure
+    airport and must be given without a UTC offset.
+    """
+    if departure_airport is None and arrival_airport is None:
+        raise HTTPException(
+            status_code=400, detail="departure_airport or arrival_airport is required."
+        )
+
+    local = time_zone == "local"
+    departure_from = parse_search_time(departure_from, local)
+    departure_to = parse_search_time(departure_to, local)
+    if departure_from and departure_to and departure_from >= departure_to:
+        raise HTTPException(
+            status_code=400, detail="departure_from must be before departure_to."
+        )
+
+    after = None
+    if cursor:
+        departure_time, flight_id = parse_cursor(cursor, str, str)
+        try:
+            after = (datetime.fromisoformat(departure_time), flight_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    records, next_cursor = paginate(
+        await db.search_flights(
+            departure_airport,
+            arrival_airport,
+            departure_from,
+            departure_to,
+            local,
+            limit=limit + 1,
+            after=after,
+        ),
+        limit,
+        key=lambda record: [record.departure_time.isoformat(), record.id],
+    )
+    return json_response(
+        {
+            "flights": serialization.flights_to_json(records),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@app.get("/flights/stats")
+async def list_flight_stats(
+    flight_id: List[str] = Query(..., min_length=1, max_length=MAX_PAGE_SIZE),
+) -> dto.ListFlightStatsResponse:
+    """Stats of the requested flights, in request order; unknown ones are left out."""
+    flight_ids = list(dict.fromkeys(flight_id))
+    stats = {row.flight_id: row for row in await db.get_flight_stats(flight_ids)}
+    return dto.ListFlightStatsResponse(
+        flights=[
+            dto.FlightStatsResponse(**stats[flight_id]._asdict())
+            for flight_id in flight_ids
+            if flight_id in stats
+        ]
+    )
+
+
+@app.get("/flights/{flight_id}/stats")
+async def get_flight_stats(flight_id: str) -> dto.FlightStatsResponse:
+    stats = await db.get_flight_stats([flight_id])
+    if not stats:
+        raise HTTPException(status_code=404, detail=f"Flight:{flight_id} not found.")
+
+    return dto.FlightStatsResponse(**stats[0]._asdict())
 
 
 @app.get("/flights/{flight_id}/passengers")
-async def list_passengers(flight_id: str):
-    passengers = db.list_passengers(flight_id)
-    return dto.ListPassengerResponse(
-        passengers=[
-            dto.PassengerResponse(
-                flight_id=record.flight_id,
-                customer_id=record.customer_id,
-                passport_id=record.customer.passport_id,
-                first_name=record.customer.first_name,
-                last_name=record.customer.last_name,
+async def list_passengers(
+    request: Request,
+    flight_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dto.ListPassengerResponse:
+    after = None
+    if cursor:
+        cursor_flight_id, after = parse_cursor(cursor, str, int)
+        if cursor_flight_id != flight_id:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # Read before the rows, so the ETag is never newer than the content.
+    version = await db.get_passengers_version(flight_id)
+    etag = None
+    if version is not None:
+        etag = make_etag(flight_id, version, limit, cursor, wants_ndjson(request))
+        if matches_if_none_match(request, etag):
+            return negotiated(not_modified(etag))
+
+    if wants_ndjson(request):
+        return negotiated(
+            ndjson_response(
+                db.stream_passengers(flight_id, after),
+                serialization.passengers_to_json,
+                etag,
             )
-            for record in passengers
-        ]
+        )
+
+    passengers, next_cursor = paginate(
+        await db.list_passengers(flight_id, limit=limit + 1, after=after),
+        limit,
+        key=lambda record: [record.flight_id, record.customer_id],
+    )
+    return negotiated(
+        json_response(
+            {
+                "passengers": serialization.passengers_to_json(passengers),
+                "next_cursor": next_cursor,
+            },
+            etag,
+        )
     )
 
 
+@app.get("/customers/{customer_id}/flights")
+async def list_customer_flights(
+    customer_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dto.ListFlightsResponse:
+    flights = await db.list_customer_flights(
+        customer_id=customer_id, limit=limit + 1, after=parse_flight_cursor(cursor)
+    )
+    if flights is None:
+        raise HTTPException(
+            status_code=404, detail=f"Customer:{customer_id} not found."
+        )
+
+    return flights_page(flights, limit)
+
+
+@app.get("/passports/{passport_id}/flights")
+async def list_passport_flights(
+    passport_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> dto.ListFlightsResponse:
+    flights = await db.list_customer_flights(
+        passport_id=passport_id, limit=limit + 1, after=parse_flight_cursor(cursor)
+    )
+    if flights is None:
+        raise HTTPException(
+            status_code=404, detail=f"Passport:{passport_id} not found."
+        )
+
+    return flights_page(flights, limit)
+
+
 @app.post("/flights/{flight_id}/passengers")
 async def create_passenger(
+    request: Request,
+    flight_id: str,
+    create_req: dto.CreateOrUpdatePassengerRequest,
+    idempotency_key: Optional[str] = Header(None),
+) -> dto.PassengerResponse:
+    return await idempotent(
+        request,
+        idempotency_key,
+        create_req.model_dump_json(),
+        lambda: book_passenger(flight_id, create_req),
+    )
+
+
+async def book_passenger(
     flight_id: str, create_req: dto.CreateOrUpdatePassengerRequest
 ) -> dto.PassengerResponse:
-    validate_flight_id(flight_id)
-    await validate_passport(create_req)
+    await validate_booking(flight_id, create_req)
 
-    result = db.create_passenger(
-        flight_id=flight_id,
-        passport_id=create_req.passport_id,
-        first_name=create_req.first_name,
-        last_name=create_req.last_name,
-    )
-    return dto.PassengerResponse(
-        flight_id=result.flight_id,
-        customer_id=result.customer.id,
-        passport_id=result.customer.passport_id,
-        first_name=result.customer.first_name,
-        last_name=result.customer.last_name,
+    try:
+        result = await db.create_passenger(
+            flight_id=flight_id,
+            passport_id=create_req.passport_id,
+            first_name=create_req.first_name,
+            last_name=create_req.last_name,
+        )
+        return dto.PassengerResponse(**result._asdict())
+
+    except EntityNotFound:
+        raise HTTPException(status_code=404, detail=f"Flight:{flight_id} not found.")
+    except EntityAlreadyExists:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Passport:{create_req.passport_id} is already booked on this flight.",
+        )
+
+
+@app.post("/flights/{flight_id}/passengers/batch")
+async def create_passengers(
+    flight_id: str, batch_req: dto.BatchCreatePassengerRequest
+) -> dto.BatchCreatePassengerResponse:
+    await validate_flight_id(flight_id)
+
+    results = [None] * len(batch_req.passengers)
+    seen_passport_ids = set()
+    for index, req in enumerate(batch_req.passengers):
+        if req.passport_id in seen_passport_ids:
+            results[index] = dto.BatchPassengerResult(
+                status_code=400, detail="Passport is duplicated in the batch."
+            )
+        seen_passport_ids.add(req.passport_id)
+
+    semaphore = asyncio.Semaphore(BATCH_PASSPORT_CONCURRENCY)
+
+    async def validate(index: int, req: dto.CreateOrUpdatePassengerRequest):
+        async with semaphore:
+            try:
+                await validate_passport(req)
+            except HTTPException as e:
+                results[index] = dto.BatchPassengerResult(
+                    status_code=e.status_code, detail=e.detail
+                )
+
+    await asyncio.gather(
+        *(
+            validate(index, req)
+            for index, req in enumerate(batch_req.passengers)
+            if results[index] is None
+        )
     )
 
+    valid = [
+        (index, req)
+        for index, req in enumerate(batch_req.passengers)
+        if results[index] is None
+    ]
+    try:
+        created = await db.create_passengers(
+            flight_id=flight_id,
+            passengers=[
+                (req.passport_id, req.first_name, req.last_name) for _, req in valid
+            ],
+        )
+    except EntityNotFound:
+        raise HTTPException(status_code=404, detail=f"Flight:{flight_id} not found.")
+    for (index, req), result in zip(valid, created):
+        if not result:
+            results[index] = dto.BatchPassengerResult(
+                status_code=409,
+                detail=f"Passport:{req.passport_id} is already booked on this flight.",
+            )
+            continue
+
+        results[index] = dto.BatchPassengerResult(
+            status_code=200,
+            passenger=dto.PassengerResponse(**result._asdict()),
+        )
+
+    return dto.BatchCreatePassengerResponse(results=results)
+
 
 @app.put("/flights/{flight_id}/passengers/{customer_id}")
 async def update_passenger(
+    request: Request,
+    flight_id: str,
+    customer_id: int,
+    update_req: dto.CreateOrUpdatePassengerRequest,
+    idempotency_key: Optional[str] = Header(None),
+) -> dto.PassengerResponse:
+    return await idempotent(
+        request,
+        idempotency_key,
+        update_req.model_dump_json(),
+        lambda: change_passenger(flight_id, customer_id, update_req),
+    )
+
+
+async def change_passenger(
     flight_id: str, customer_id: int, update_req: dto.CreateOrUpdatePassengerRequest
 ) -> dto.PassengerResponse:
-    validate_flight_id(flight_id)
-    await validate_passport(update_req)
+    await validate_booking(flight_id, update_req)
 
     try:
-        result = db.update_passenger(
+        result = await db.update_passenger(
             flight_id=flight_id,
             customer_id=customer_id,
             passport_id=update_req.passport_id,
@@ -89,24 +419,34 @@ async def update_passenger(
             last_name=update_req.last_name,
         )
 
-        return dto.PassengerResponse(
-            flight_id=result.flight_id,
-            customer_id=result.customer.id,
-            passport_id=result.customer.passport_id,
-            first_name=result.customer.first_name,
-            last_name=result.customer.last_name,
-        )
+        return dto.PassengerResponse(**result._asdict())
 
     except EntityNotFound:
         raise HTTPException(
             status_code=404, detail=f"Passenger:{customer_id} not found."
         )
+    except EntityAlreadyExists:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Passport:{update_req.passport_id} belongs to another customer.",
+        )
 
 
 @app.delete("/flights/{flight_id}/passengers/{customer_id}")
-async def delete_passenger(flight_id: str, customer_id: int):
+async def delete_passenger(
+    request: Request,
+    flight_id: str,
+    customer_id: int,
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await idempotent(
+        request, idempotency_key, "", lambda: remove_passenger(flight_id, customer_id)
+    )
+
+
+async def remove_passenger(flight_id: str, customer_id: int):
     try:
-        db.delete_passenger(flight_id, customer_id)
+        await db.delete_passenger(flight_id, customer_id)
         return None
     except EntityNotFound:
         raise HTTPException(
@@ -114,8 +454,29 @@ async def delete_passenger(flight_id: str, customer_id: int):
         )
 
 
+async def validate_booking(flight_id: str, req: dto.CreateOrUpdatePassengerRequest):
+    """Check the flight and the passport concurrently.
+
+    An unknown flight is reported before any passport error, as when the
+    checks ran one after the other, and cancels the passport lookup.
+    """
+    passport_check = asyncio.create_task(validate_passport(req))
+    try:
+        await validate_flight_id(flight_id)
+    except BaseException:
+        passport_check.cancel()
+        await asyncio.gather(passport_check, return_exceptions=True)
+        raise
+
+    await passport_check
+
+
 async def validate_passport(req=dto.CreateOrUpdatePassengerRequest):
-    detail = await get_passport_detail(req.passport_id)
+    try:
+        detail = await get_passport_detail(req.passport_id)
+    except PassportAPIError:
+        raise HTTPException(status_code=503, detail="Passport API is unavailable.")
+
     if not detail:
         raise HTTPException(status_code=400, detail="Passport not found.")
 
@@ -129,7 +490,153 @@ async def validate_passport(req=dto.CreateOrUpdatePassengerRequest):
         )
 
 
-def validate_flight_id(flight_id: str):
-    db = get_db()
-    if not db.does_flight_exists(flight_id):
+async def validate_flight_id(flight_id: str):
+    if not await catalog.does_flight_exists(flight_id):
         raise HTTPException(status_code=404, detail=f"Flight:{flight_id} not found.")
+
+
+async def idempotent(
+    request: Request,
+    idempotency_key: Optional[str],
+    payload: str,
+    handler: Callable[[], Awaitable[Optional[BaseModel]]],
+):
+    """Run a write once per Idempotency-Key and replay its response.
+
+    Without a key the handler's result is returned as is.
+    """
+    if idempotency_key is None:
+        return await handler()
+
+    if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key.")
+
+    async def respond() -> Tuple[int, str]:
+        try:
+            result = await handler()
+        except HTTPException as e:
+            if e.status_code >= 500:
+                raise
+            return e.status_code, serialization.dumps({"detail": e.detail}).decode()
+
+        content = result.model_dump(mode="json") if result is not None else None
+        return 200, serialization.dumps(content).decode()
+
+    try:
+        stored, replayed = await idempotency.run(
+            idempotency_key,
+            fingerprint(request.method, request.url.path, payload),
+            respond,
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for another request.",
+        )
+    except IdempotencyKeyInProgress:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is in progress.",
+            headers={"Retry-After": "1"},
+        )
+
+    response = Response(
+        stored.body, status_code=stored.status_code, media_type="application/json"
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def parse_search_time(value: Optional[datetime], local: bool) -> Optional[datetime]:
+    """Return a search bound as a naive datetime, in UTC unless ``local``."""
+    if value is None or value.tzinfo is None:
+        return value
+
+    if local:
+        raise HTTPException(
+            status_code=400,
+            detail="Times of a local search must not have a UTC offset.",
+        )
+
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_cursor(cursor: str, *types: type) -> list:
+    """Decode a cursor and check it holds a key of the given column types."""
+    try:
+        key = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    if len(key) != len(types) or not all(
+        type(value) is type_ for value, type_ in zip(key, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    return key
+
+
+def parse_flight_cursor(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+
+    (after,) = parse_cursor(cursor, str)
+    return after
+
+
+def flights_page(records, limit: int) -> Response:
+    """Respond with a page of flights fetched with ``limit + 1``."""
+    records, next_cursor = paginate(records, limit, key=lambda record: [record.id])
+    return json_response(
+        {
+            "flights": serialization.flights_to_json(records),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def json_response(content, etag: Optional[str] = None) -> Response:
+    """Return already JSON-ready content without re-validating it.
+
+    The route's return annotation still documents the schema in OpenAPI.
+    """
+    response = Response(serialization.dumps(content), media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+
+def ndjson_response(
+    batches, to_json, etag: Optional[str] = None
+) -> StreamingResponse:
+    """Stream batches of records as newline-delimited JSON, one record per line."""
+
+    async def lines():
+        async for batch in batches:
+            yield b"".join(
+                serialization.dumps(row) + b"\n" for row in to_json(batch)
+            )
+
+    response = StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+    set_etag(response, etag)
+    return response
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    if etag:
+        response.headers["ETag"] = etag
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def negotiated(response: Response) -> Response:
+    """Mark a response whose representation, JSON or NDJSON, was picked by the
+    Accept header, so caches keep one per representation."""
+    response.headers["Vary"] = "Accept"
+    return response
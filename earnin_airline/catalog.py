@@ -0,0 +1,180 @@
+from bisect import bisect_right
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import logging
+import os
+
+import asyncpg
+
+from . import timezone
+from .db import STREAM_BATCH_SIZE, FlightRow, asyncpg_dsn, use_primary
+
+
+logger = logging.getLogger(__name__)
+
+FLIGHT_CATALOG_ENABLED = os.getenv("FLIGHT_CATALOG_ENABLED", "true") == "true"
+# Seconds between full reloads, in case a notification is missed.
+FLIGHT_CATALOG_REFRESH_INTERVAL = float(
+    os.getenv("FLIGHT_CATALOG_REFRESH_INTERVAL", "300")
+)
+# Seconds to wait before reconnecting a lost LISTEN connection.
+FLIGHT_CATALOG_RECONNECT_DELAY = 5.0
+
+# Channel notified by the flights_changed trigger in db/schema.sql.
+FLIGHTS_CHANNEL = "flights_changed"
+
+
+class FlightCatalog:
+    """In-memory copy of the flights table, kept fresh by LISTEN/NOTIFY.
+
+    Serves ``does_flight_exists`` and ``list_flights`` like the DB does. Until
+    the catalog is loaded, or when it is not started at all, calls fall through
+    to the database.
+    """
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.loaded = False
+        self.flights: Dict[str, FlightRow] = {}
+        self.flight_ids: List[str] = []
+        # Hash of the loaded content, equal across workers holding the same
+        # flights; used for ETags.
+        self.version: Optional[str] = None
+        self.stale = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        # Listen before the first load so no change falls between the two.
+        connection = await self._listen()
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("Cannot load flight catalog, retrying in background")
+            self.stale.set()
+
+        self.tasks = [
+            asyncio.create_task(self._listen_forever(connection)),
+            asyncio.create_task(self._refresh_forever()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def load(self) -> None:
+        # From the primary, which sent the notifications: a lagging replica
+        # could miss the change they announce.
+        with use_primary():
+            flights = {record.id: record for record in await self.db.list_flights()}
+        invalid_zones = timezone.validate_zones(
+            zone_name
+            for record in flights.values()
+            for zone_name in (record.departure_timezone, record.arrival_timezone)
+        )
+        if invalid_zones:
+            logger.error("Flights use unknown timezones: %s", ", ".join(invalid_zones))
+
+        flight_ids = sorted(flights)
+        self.version = _content_version(flights[flight_id] for flight_id in flight_ids)
+        self.flights = flights
+        self.flight_ids = flight_ids
+        self.loaded = True
+
+    async def does_flight_exists(self, flight_id: str) -> bool:
+        if self.loaded and flight_id in self.flights:
+            return True
+
+        # The flight may have been created after the last load, so a miss is
+        # confirmed against the database.
+        does_exists = await self.db.does_flight_exists(flight_id)
+        if does_exists and self.loaded:
+            self.stale.set()
+        return does_exists
+
+    async def list_flights(
+        self, limit: Optional[int] = None, after: Optional[str] = None
+    ) -> List[FlightRow]:
+        if not self.loaded:
+            return await self.db.list_flights(limit=limit, after=after)
+
+        return self._slice(limit, after)
+
+    def stream_flights(
+        self, after: Optional[str] = None
+    ) -> AsyncIterator[List[FlightRow]]:
+        if not self.loaded:
+            return self.db.stream_flights(after)
+
+        return self._stream(after)
+
+    async def _stream(self, after: Optional[str]) -> AsyncIterator[List[FlightRow]]:
+        while True:
+            batch = self._slice(STREAM_BATCH_SIZE, after)
+            if not batch:
+                return
+
+            yield batch
+            after = batch[-1].id
+
+    def _slice(self, limit: Optional[int], after: Optional[str]) -> List[FlightRow]:
+        flights, flight_ids = self.flights, self.flight_ids
+        start = 0 if after is None else bisect_right(flight_ids, after)
+        stop = None if limit is None else start + limit
+        return [flights[flight_id] for flight_id in flight_ids[start:stop]]
+
+    async def _listen(self) -> Optional[asyncpg.Connection]:
+        try:
+            connection = await asyncpg.connect(asyncpg_dsn())
+            await connection.add_listener(
+                FLIGHTS_CHANNEL, lambda *args: self.stale.set()
+            )
+            return connection
+        except Exception:
+            logger.exception("Cannot listen to %s", FLIGHTS_CHANNEL)
+            return None
+
+    async def _listen_forever(self, connection: Optional[asyncpg.Connection]) -> None:
+        while True:
+            if connection:
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                try:
+                    await closed.wait()
+                finally:
+                    await connection.close()
+
+                logger.warning("Lost connection listening to %s", FLIGHTS_CHANNEL)
+
+            await asyncio.sleep(FLIGHT_CATALOG_RECONNECT_DELAY)
+            connection = await self._listen()
+            if connection:
+                # Changes made while disconnected were not notified.
+                self.stale.set()
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self.stale.wait(), FLIGHT_CATALOG_REFRESH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self.stale.clear()
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Cannot reload flight catalog")
+                await asyncio.sleep(FLIGHT_CATALOG_RECONNECT_DELAY)
+                self.stale.set()
+
+
+def _content_version(records: Iterable[FlightRow]) -> str:
+    digest = hashlib.sha1()
+    for record in records:
+        digest.update(repr(tuple(record)).encode())
+
+    return digest.hexdigest()
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from .db import MAX_BATCH_SIZE
 
 
 class CreateOrUpdatePassengerRequest(BaseModel):
@@ -20,6 +22,25 @@ class PassengerResponse(BaseModel):
 
 class ListPassengerResponse(BaseModel):
     passengers: List[PassengerResponse]
+    next_cursor: Optional[str] = None
+
+
+class BatchCreatePassengerRequest(BaseModel):
+    # Bounded so the statements of a batch stay within the bind parameter
+    # limit of PostgreSQL.
+    passengers: List[CreateOrUpdatePassengerRequest] = Field(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+
+class BatchPassengerResult(BaseModel):
+    status_code: int
+    passenger: Optional[PassengerResponse] = None
+    detail: Optional[str] = None
+
+
+class BatchCreatePassengerResponse(BaseModel):
+    results: List[BatchPassengerResult]
 
 
 class FlightResponse(BaseModel):
@@ -32,3 +53,13 @@ class FlightResponse(BaseModel):
 
 class ListFlightsResponse(BaseModel):
     flights: List[FlightResponse]
+    next_cursor: Optional[str] = None
+
+
+class FlightStatsResponse(BaseModel):
+    flight_id: str
+    passenger_count: int
+
+
+class ListFlightStatsResponse(BaseModel):
+    flights: List[FlightStatsResponse]
@@ -0,0 +1,23 @@
+from typing import Any
+import hashlib
+
+from fastapi import Request
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the parts a response's content depends on."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return etag in (candidate.removeprefix("W/") for candidate in candidates)
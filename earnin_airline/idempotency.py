@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+
+from .cache import MISSING, SingleFlight, TTLCache
+from .db import StoredResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response is replayed for its idempotency key.
+IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+# Responses kept in memory in front of the idempotency_keys table.
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Seconds between deletions of expired keys from the table.
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
+# Seconds a key stays reserved for the request running its write; the key of
+# a worker that died meanwhile can be taken over after them.
+IDEMPOTENCY_PENDING_TIMEOUT = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", "60"))
+# Seconds a retry waits for the request holding its key before giving up.
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+# Bounds of the interval between checks of a held key while waiting.
+POLL_INTERVAL_MIN = 0.01
+POLL_INTERVAL_MAX = 0.5
+# Matches the idempotency_keys.key column.
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyKeyInProgress(Exception):
+    """The request holding the key did not finish within IDEMPOTENCY_WAIT_TIMEOUT."""
+
+
+def fingerprint(method: str, path: str, payload: str = "") -> str:
+    return hashlib.sha1(f"{method} {path} {payload}".encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Stores the response of a write under its idempotency key and replays it.
+
+    Responses live in the idempotency_keys table, shared by every worker, with
+    a bounded in-process cache in front. The first request reserves the key
+    in the table before running the write, so a concurrent request with the
+    same key, in any worker, waits for its response instead of writing again.
+    Within one worker such requests also share a single wait.
+    """
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.cache = TTLCache(IDEMPOTENCY_CACHE_SIZE)
+        self.calls = SingleFlight()
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self.tasks = [asyncio.create_task(self._purge_forever())]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Tuple[int, str]]],
+    ) -> Tuple[StoredResponse, bool]:
+        """Return the response for ``key`` and whether it is a replay.
+
+        ``handler`` performs the write and returns its status code and JSON
+        body; it is only called by the request that reserved the key. Server
+        errors are raised and release the key, so the request can be retried.
+        Raises IdempotencyKeyInProgress if another request holds the key for
+        longer than IDEMPOTENCY_WAIT_TIMEOUT.
+        """
+        executed = False
+
+        async def load() -> StoredResponse:
+            nonlocal executed
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + IDEMPOTENCY_WAIT_TIMEOUT
+            interval = POLL_INTERVAL_MIN
+            while True:
+                response = await self.db.get_stored_response(key)
+                if response is None:
+                    if await self.db.reserve_response(
+                        key, fingerprint, _seconds_from_now(IDEMPOTENCY_PENDING_TIMEOUT)
+                    ):
+                        executed = True
+                        response = await self._execute(key, fingerprint, handler)
+                        break
+                    # Reserved by another request since; read its row.
+                    continue
+
+                if not response.pending or response.fingerprint != fingerprint:
+                    break
+
+                if loop.time() >= deadline:
+                    raise IdempotencyKeyInProgress()
+                await asyncio.sleep(min(interval, deadline - loop.time()))
+                interval = min(interval * 2, POLL_INTERVAL_MAX)
+
+            if not response.pending:
+                self.cache.set(key, response, _seconds_until(response.expires_at))
+            return response
+
+        response = self.cache.get(key)
+        if response is MISSING:
+            response = await self.calls.do(key, load)
+
+        if response.fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+
+        return response, not executed
+
+    async def _execute(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Tuple[int, str]]],
+    ) -> StoredResponse:
+        try:
+            status_code, body = await handler()
+        except BaseException:
+            try:
+                await self.db.release_response(key, fingerprint)
+            except Exception:
+                # The reservation still expires after IDEMPOTENCY_PENDING_TIMEOUT.
+                logger.exception("Cannot release idempotency key")
+            raise
+
+        response = StoredResponse(
+            fingerprint, status_code, body, _seconds_from_now(IDEMPOTENCY_KEY_TTL)
+        )
+        # None only if the reservation expired meanwhile; the response is
+        # still this request's.
+        return await self.db.store_response(key, response) or response
+
+    async def _purge_forever(self) -> None:
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_PURGE_INTERVAL)
+            try:
+                purged = await self.db.purge_stored_responses()
+                logger.info("Purged %d expired idempotency keys", purged)
+            except Exception:
+                logger.exception("Cannot purge expired idempotency keys")
+
+
+def _seconds_from_now(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def _seconds_until(moment: datetime) -> float:
+    return (moment - datetime.now(timezone.utc)).total_seconds()
@@ -0,0 +1,225 @@
+"""
+Load a flight schedule into the flights table.
+
+Reads a CSV file with a header row, or an NDJSON file with one object per
+line, holding the columns id, departure_time, arrival_time, departure_airport,
+arrival_airport, departure_timezone and arrival_timezone. Times are ISO 8601;
+ones without an offset are taken as UTC.
+
+The file is read twice: first to validate every row and timezone, so nothing
+is written if any is wrong, then to COPY batches into a staging table and
+upsert them into flights by id. Memory use is bounded by the batch size.
+
+    python -m earnin_airline.loader schedule.csv [--batch-size 50000]
+"""
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+
+import asyncpg
+
+from . import timezone
+from .db import FlightRow, asyncpg_dsn
+
+
+LOADER_BATCH_SIZE = 50_000
+
+# Column sizes of the flights table in db/schema.sql.
+MAX_LENGTHS = {
+    "id": 8,
+    "departure_airport": 3,
+    "arrival_airport": 3,
+    "departure_timezone": 30,
+    "arrival_timezone": 30,
+}
+
+# (field, max length or None, is a time) for every column, in FlightRow order.
+FIELD_CHECKS = [
+    (field, MAX_LENGTHS.get(field), field.endswith("_time"))
+    for field in FlightRow._fields
+]
+
+STAGING_TABLE = "flights_staging"
+
+# Catalog columns only, so passengers_version and passenger_count of existing
+# flights are left alone. Unchanged rows are not rewritten.
+UPSERT_SQL = f"""
+INSERT INTO flights ({", ".join(FlightRow._fields)})
+SELECT {", ".join(FlightRow._fields)} FROM {STAGING_TABLE}
+ON CONFLICT (id) DO UPDATE SET
+    {", ".join(f"{field} = excluded.{field}" for field in FlightRow._fields[1:])}
+WHERE ({", ".join(f"flights.{field}" for field in FlightRow._fields[1:])})
+    IS DISTINCT FROM
+    ({", ".join(f"excluded.{field}" for field in FlightRow._fields[1:])})
+"""
+
+
+class InvalidSchedule(ValueError):
+    pass
+
+
+class LoadReport(NamedTuple):
+    rows: int
+    written: int
+    seconds: float
+
+    def __str__(self) -> str:
+        rate = self.rows / self.seconds if self.seconds else 0
+        return (
+            f"Loaded {self.rows} flights ({self.written} inserted or changed)"
+            f" in {self.seconds:.2f}s, {rate:.0f} rows/s"
+        )
+
+
+def read_schedule(path: str, format: str) -> Iterator[Tuple[int, FlightRow]]:
+    """Yield the line number and parsed row of every flight in the file."""
+    with open(path, newline="") as file:
+        if format == "csv":
+            reader = csv.DictReader(file)
+            records = ((reader.line_num, record) for record in reader)
+        else:
+            records = (
+                (line_num, _parse_json(line_num, line))
+                for line_num, line in enumerate(file, start=1)
+                if line.strip()
+            )
+
+        for line_num, record in records:
+            yield line_num, _parse_row(line_num, record)
+
+
+def validate_schedule(path: str, format: str) -> int:
+    """Check every row and timezone of the file and return the number of rows."""
+    rows = 0
+    zone_lines: Dict[str, int] = {}
+    for line_num, row in read_schedule(path, format):
+        rows += 1
+        zone_lines.setdefault(row.departure_timezone, line_num)
+        zone_lines.setdefault(row.arrival_timezone, line_num)
+
+    invalid_zones = timezone.validate_zones(zone_lines)
+    if invalid_zones:
+        raise InvalidSchedule(
+            "Unknown timezones: "
+            + ", ".join(f"{zone} (line {zone_lines[zone]})" for zone in invalid_zones)
+        )
+
+    return rows
+
+
+async def load_schedule(
+    path: str,
+    format: str,
+    batch_size: int = LOADER_BATCH_SIZE,
+    dsn: Optional[str] = None,
+) -> LoadReport:
+    started = time.perf_counter()
+    validate_schedule(path, format)
+
+    rows = written = 0
+    connection = await asyncpg.connect(dsn or asyncpg_dsn())
+    try:
+        await connection.execute(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE}"
+            " (LIKE flights INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        for batch in _batches(read_schedule(path, format), batch_size):
+            async with connection.transaction():
+                await connection.copy_records_to_table(
+                    STAGING_TABLE, records=batch, columns=FlightRow._fields
+                )
+                status = await connection.execute(UPSERT_SQL)
+
+            rows += len(batch)
+            written += int(status.split()[-1])
+    finally:
+        await connection.close()
+
+    return LoadReport(rows, written, time.perf_counter() - started)
+
+
+def _batches(
+    rows: Iterator[Tuple[int, FlightRow]], batch_size: int
+) -> Iterator[List[FlightRow]]:
+    # Keyed by id: a flight listed twice in a batch keeps its last row, as
+    # the upsert cannot change the same row twice in one statement.
+    batch: Dict[str, FlightRow] = {}
+    for _, row in rows:
+        batch[row.id] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+
+    if batch:
+        yield list(batch.values())
+
+
+def _parse_json(line_num: int, line: str) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise InvalidSchedule(f"Line {line_num}: invalid JSON: {e}")
+
+    if not isinstance(record, dict):
+        raise InvalidSchedule(f"Line {line_num}: expected a JSON object")
+
+    return record
+
+
+def _parse_row(line_num: int, record: dict) -> FlightRow:
+    values = []
+    for field, max_length, is_time in FIELD_CHECKS:
+        value = record.get(field)
+        if not value or not isinstance(value, str):
+            raise InvalidSchedule(f"Line {line_num}: missing {field}")
+
+        if max_length and len(value) > max_length:
+            raise InvalidSchedule(f"Line {line_num}: {field} is longer than {max_length}")
+
+        values.append(_parse_utc(line_num, field, value) if is_time else value)
+
+    return FlightRow._make(values)
+
+
+def _parse_utc(line_num: int, field: str, value: str) -> datetime:
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidSchedule(f"Line {line_num}: {field} is not an ISO 8601 time")
+
+    offset = moment.utcoffset()
+    if offset is not None:
+        moment = (moment - offset).replace(tzinfo=None)
+
+    return moment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        help="defaults to ndjson for .ndjson and .jsonl files, csv otherwise",
+    )
+    parser.add_argument("--batch-size", type=int, default=LOADER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    format = args.format or (
+        "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+    )
+    try:
+        report = asyncio.run(load_schedule(args.path, format, args.batch_size))
+    except (InvalidSchedule, OSError) as e:
+        sys.exit(f"error: {e}")
+
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Prometheus metrics of the worker, served at /metrics.
+
+Covers request latency per route, SQL statement time per DB method, the
+database connection pools and the Passport API. Each worker process keeps and
+serves its own metrics.
+"""
+from contextvars import ContextVar
+from typing import Dict, Iterator, Tuple
+import functools
+import inspect
+import os
+import time
+import weakref
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true") == "true"
+
+# Statements run outside a DB method, e.g. by the tests, are labelled "other".
+db_method: ContextVar[str] = ContextVar("db_method", default="other")
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, streaming the response included.",
+    ["method", "route", "status"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time to execute a SQL statement, fetching the rows of a stream excluded.",
+    ["method"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time to get a connection from a pool, waiting for a free one included.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+PASSPORT_API_SECONDS = Histogram(
+    "passport_api_request_duration_seconds",
+    "Time of a request to the Passport API, by outcome (found, not_found, error).",
+    ["outcome"],
+)
+PASSPORT_API_ERRORS = Counter(
+    "passport_api_lookup_errors",
+    "Passport lookups that got no answer, by reason"
+    " (error, rejected, deadline, circuit_open).",
+    ["reason"],
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing REQUEST_SECONDS.
+
+    Requests are labelled by route template rather than path, to keep the
+    number of series bounded.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"], route.path if route else "unmatched", status
+            ).observe(time.perf_counter() - started)
+
+
+def label_db_methods(cls):
+    """Label the SQL statements run by the public methods of ``cls`` with the
+    method name in DB_QUERY_SECONDS."""
+    if not METRICS_ENABLED:
+        return cls
+
+    for name, fn in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(fn):
+            setattr(cls, name, _labelled(fn, name))
+
+    return cls
+
+
+def _labelled(fn, name: str):
+    if inspect.isasyncgenfunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # The label is set around each step only, as the consumer may run
+            # other methods between two of them.
+            generator = fn(*args, **kwargs)
+            try:
+                while True:
+                    token = db_method.set(name)
+                    try:
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        db_method.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+
+    elif inspect.isgeneratorfunction(fn):
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            generator = fn(*args, **kwargs)
+            try:
+                while True:
+                    token = db_method.set(name)
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        db_method.reset(token)
+                    yield item
+            finally:
+                generator.close()
+
+    elif inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = db_method.set(name)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                db_method.reset(token)
+
+    else:
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = db_method.set(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                db_method.reset(token)
+
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERY_SECONDS.labels(db_method.get()).observe(
+        time.perf_counter() - context.metrics_started
+    )
+
+
+class _TimedCheckout:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool observing DB_POOL_CHECKOUT_SECONDS."""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool observing DB_POOL_CHECKOUT_SECONDS."""
+
+
+# Pool classes of the engines of db.py.
+SYNC_POOL_CLASS = TimedQueuePool if METRICS_ENABLED else QueuePool
+ASYNC_POOL_CLASS = (
+    TimedAsyncAdaptedQueuePool if METRICS_ENABLED else AsyncAdaptedQueuePool
+)
+
+
+# Engines whose pools are reported, with the database they connect to
+# ("primary" or "replica").
+_engines: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+
+def watch_pool(engine: Engine, database: str) -> None:
+    _engines[engine] = database
+
+
+class PoolCollector(Collector):
+    """Connections in use and idle of the watched pools, read at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        totals: Dict[str, Tuple[int, int]] = {}
+        for engine, database in list(_engines.items()):
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                in_use, idle = totals.get(database, (0, 0))
+                totals[database] = (in_use + pool.checkedout(), idle + pool.checkedin())
+
+        in_use = GaugeMetricFamily(
+            "db_pool_connections_in_use",
+            "Connections checked out of the pools.",
+            labels=["database"],
+        )
+        idle = GaugeMetricFamily(
+            "db_pool_connections_idle",
+            "Open connections waiting in the pools.",
+            labels=["database"],
+        )
+        for database, (database_in_use, database_idle) in totals.items():
+            in_use.add_metric([database], database_in_use)
+            idle.add_metric([database], database_idle)
+
+        yield in_use
+        yield idle
+
+
+def render() -> Tuple[bytes, str]:
+    """Return the metrics in the text format and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+if METRICS_ENABLED:
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    REGISTRY.register(PoolCollector())
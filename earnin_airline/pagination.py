@@ -0,0 +1,45 @@
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+import base64
+import binascii
+import json
+import os
+
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+T = TypeVar("T")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor()
+
+    if not isinstance(key, list):
+        raise InvalidCursor()
+
+    return key
+
+
+def paginate(
+    rows: Sequence[T], limit: int, key: Callable[[T], Sequence[Any]]
+) -> Tuple[Sequence[T], Optional[str]]:
+    """Split ``rows``, fetched with ``limit + 1``, into a page and its next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
@@ -1,12 +1,72 @@
 from dataclasses import dataclass
 from typing import Optional
+import asyncio
 import os
+import time
 
 import aiohttp
 
+from . import metrics
+from .cache import MISSING, SingleFlight, TTLCache
+from .resilience import CircuitBreaker, CircuitOpen, LatencyWindow, hedged, retry
+
 
 PASSPORT_API_URL = os.getenv("PASSPORT_API", "http://localhost:8081")
 
+# Connection pool settings of the shared client session. A limit of 0 means
+# no limit, following aiohttp.
+PASSPORT_API_LIMIT = int(os.getenv("PASSPORT_API_LIMIT", "100"))
+PASSPORT_API_LIMIT_PER_HOST = int(os.getenv("PASSPORT_API_LIMIT_PER_HOST", "0"))
+PASSPORT_API_KEEPALIVE_TIMEOUT = float(
+    os.getenv("PASSPORT_API_KEEPALIVE_TIMEOUT", "30")
+)
+PASSPORT_API_DNS_CACHE_TTL = int(os.getenv("PASSPORT_API_DNS_CACHE_TTL", "300"))
+
+# Timeouts in seconds.
+PASSPORT_API_CONNECT_TIMEOUT = float(os.getenv("PASSPORT_API_CONNECT_TIMEOUT", "2"))
+PASSPORT_API_READ_TIMEOUT = float(os.getenv("PASSPORT_API_READ_TIMEOUT", "5"))
+
+# Seconds a lookup may take in total, retries and hedged requests included.
+PASSPORT_API_DEADLINE = float(os.getenv("PASSPORT_API_DEADLINE", "3"))
+# Extra attempts after a failed request, waiting a random time up to
+# PASSPORT_API_RETRY_BACKOFF * 2 ** attempt seconds before each.
+PASSPORT_API_RETRIES = int(os.getenv("PASSPORT_API_RETRIES", "2"))
+PASSPORT_API_RETRY_BACKOFF = float(os.getenv("PASSPORT_API_RETRY_BACKOFF", "0.05"))
+# Send a second request when the first is slower than this percentile of
+# recent response times, once enough have been seen.
+PASSPORT_API_HEDGE_ENABLED = os.getenv("PASSPORT_API_HEDGE_ENABLED", "false") == "true"
+PASSPORT_API_HEDGE_PERCENTILE = float(os.getenv("PASSPORT_API_HEDGE_PERCENTILE", "95"))
+PASSPORT_API_HEDGE_MIN_SAMPLES = int(os.getenv("PASSPORT_API_HEDGE_MIN_SAMPLES", "20"))
+PASSPORT_API_LATENCY_WINDOW = 1000
+# Consecutive failed lookups that open the circuit, and seconds it stays open.
+PASSPORT_API_BREAKER_THRESHOLD = int(os.getenv("PASSPORT_API_BREAKER_THRESHOLD", "5"))
+PASSPORT_API_BREAKER_RESET_TIMEOUT = float(
+    os.getenv("PASSPORT_API_BREAKER_RESET_TIMEOUT", "10")
+)
+
+# Lookup cache. Passports the API does not know (404) are cached for a shorter
+# time than found ones. A TTL of 0 disables caching of that kind of result.
+PASSPORT_CACHE_SIZE = int(os.getenv("PASSPORT_CACHE_SIZE", "10000"))
+PASSPORT_CACHE_TTL = float(os.getenv("PASSPORT_CACHE_TTL", "300"))
+PASSPORT_CACHE_NEGATIVE_TTL = float(os.getenv("PASSPORT_CACHE_NEGATIVE_TTL", "30"))
+
+
+class PassportAPIError(Exception):
+    """The Passport API could not answer the lookup."""
+
+
+class PassportAPIRejected(PassportAPIError):
+    """The Passport API refused the request with a client error. Retrying
+    would get the same answer, and the API itself is healthy."""
+
+
+def _is_transient(e: Exception) -> bool:
+    """Whether a failed request may succeed if sent again: a timeout, a
+    connection error, a 5xx or a 429."""
+    return isinstance(e, TimeoutError) or (
+        isinstance(e, PassportAPIError) and not isinstance(e, PassportAPIRejected)
+    )
+
 
 @dataclass
 class PassportDetail:
@@ -15,20 +75,161 @@ class PassportDetail:
     last_name: str
 
 
+session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the worker's shared client session, creating it on first use.
+
+    Must be called from a running event loop.
+    """
+    global session
+    if not session or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=PASSPORT_API_LIMIT,
+            limit_per_host=PASSPORT_API_LIMIT_PER_HOST,
+            keepalive_timeout=PASSPORT_API_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=PASSPORT_API_DNS_CACHE_TTL,
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=PASSPORT_API_CONNECT_TIMEOUT,
+            sock_read=PASSPORT_API_READ_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    return session
+
+
+async def close_session() -> None:
+    global session
+    if session:
+        await session.close()
+        session = None
+
+
+passport_cache = TTLCache(PASSPORT_CACHE_SIZE)
+passport_lookups = SingleFlight()
+breaker = CircuitBreaker(
+    PASSPORT_API_BREAKER_THRESHOLD, PASSPORT_API_BREAKER_RESET_TIMEOUT
+)
+latencies = LatencyWindow(PASSPORT_API_LATENCY_WINDOW)
+
+
 async def get_passport_detail(passport_id: str) -> Optional[PassportDetail]:
-    async with aiohttp.ClientSession() as session:
-        url = PASSPORT_API_URL + "/passport"
-        body = {"passport_id": passport_id}
-        async with session.get(url, json=body) as response:
+    detail = passport_cache.get(passport_id)
+    if detail is not MISSING:
+        return detail
+
+    return await passport_lookups.do(
+        passport_id, lambda: _fetch_and_cache(passport_id)
+    )
+
+
+async def _fetch_and_cache(passport_id: str) -> Optional[PassportDetail]:
+    detail = await lookup_passport_detail(passport_id)
+    ttl = PASSPORT_CACHE_TTL if detail else PASSPORT_CACHE_NEGATIVE_TTL
+    passport_cache.set(passport_id, detail, ttl)
+    return detail
+
+
+def passport_cache_stats() -> dict:
+    return {**passport_cache.stats(), "coalesced": passport_lookups.coalesced}
+
+
+def passport_api_stats() -> dict:
+    return {
+        **breaker.stats(),
+        "hedge_delay": hedge_delay(),
+    }
+
+
+async def lookup_passport_detail(passport_id: str) -> Optional[PassportDetail]:
+    """Fetch a passport within PASSPORT_API_DEADLINE, retrying failed requests,
+    hedging slow ones and failing fast while the circuit is open.
+
+    Raises PassportAPIError if no answer was obtained.
+    """
+
+    async def attempt() -> Optional[PassportDetail]:
+        return await hedged(lambda: _timed_fetch(passport_id), hedge_delay())
+
+    async def attempts() -> Optional[PassportDetail]:
+        async with asyncio.timeout(PASSPORT_API_DEADLINE):
+            return await retry(
+                attempt,
+                PASSPORT_API_RETRIES,
+                PASSPORT_API_RETRY_BACKOFF,
+                _is_transient,
+            )
+
+    try:
+        return await breaker.call(attempts, _is_transient)
+    except CircuitOpen as e:
+        metrics.PASSPORT_API_ERRORS.labels("circuit_open").inc()
+        raise PassportAPIError("Passport API circuit is open") from e
+    except TimeoutError as e:
+        metrics.PASSPORT_API_ERRORS.labels("deadline").inc()
+        raise PassportAPIError("Passport API deadline exceeded") from e
+    except PassportAPIRejected:
+        metrics.PASSPORT_API_ERRORS.labels("rejected").inc()
+        raise
+    except PassportAPIError:
+        metrics.PASSPORT_API_ERRORS.labels("error").inc()
+        raise
+
+
+def hedge_delay() -> Optional[float]:
+    if (
+        not PASSPORT_API_HEDGE_ENABLED
+        or len(latencies.samples) < PASSPORT_API_HEDGE_MIN_SAMPLES
+    ):
+        return None
+
+    return latencies.percentile(PASSPORT_API_HEDGE_PERCENTILE)
+
+
+async def _timed_fetch(passport_id: str) -> Optional[PassportDetail]:
+    started = time.monotonic()
+    try:
+        detail = await fetch_passport_detail(passport_id)
+    except PassportAPIError:
+        metrics.PASSPORT_API_SECONDS.labels("error").observe(
+            time.monotonic() - started
+        )
+        raise
+
+    elapsed = time.monotonic() - started
+    latencies.record(elapsed)
+    metrics.PASSPORT_API_SECONDS.labels("found" if detail else "not_found").observe(
+        elapsed
+    )
+    return detail
+
+
+async def fetch_passport_detail(passport_id: str) -> Optional[PassportDetail]:
+    url = PASSPORT_API_URL + "/passport"
+    body = {"passport_id": passport_id}
+    try:
+        async with get_session().get(url, json=body) as response:
             if response.status == 404:
                 return None
 
             if response.status != 200:
-                raise "Cannot connect to passport API: " + response.text()
+                message = (
+                    f"Passport API responded {response.status}: "
+                    + await response.text()
+                )
+                if response.status < 500 and response.status != 429:
+                    raise PassportAPIRejected(message)
+                raise PassportAPIError(message)
 
             response_body = await response.json()
-            return PassportDetail(
-                passport_id=response_body["passport_id"],
-                first_name=response_body["first_name"],
-                last_name=response_body["last_name"],
-            )
+    except (aiohttp.ClientError, TimeoutError) as e:
+        raise PassportAPIError(f"Cannot connect to passport API: {e!r}") from e
+
+    return PassportDetail(
+        passport_id=response_body["passport_id"],
+        first_name=response_body["first_name"],
+        last_name=response_body["last_name"],
+    )
+
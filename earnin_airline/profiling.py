@@ -0,0 +1,101 @@
+"""
+Opt-in profiling of single requests with pyinstrument.
+
+With PROFILING_ENABLED, a request carrying the PROFILING_HEADER header, or
+picked at PROFILING_SAMPLE_RATE, is profiled from the first byte received to
+the last byte sent. Time awaiting the database or the Passport API shows as
+``[await]`` frames. Each profile is written to PROFILING_DIR, as speedscope
+JSON (https://www.speedscope.app) or pyinstrument's HTML page, and its file
+name is returned in the PROFILING_HEADER response header.
+
+When disabled the middleware is not installed and pyinstrument is not
+imported.
+"""
+from datetime import datetime, timezone
+import os
+import random
+import re
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false") == "true"
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+# A request with this header (any value) is profiled.
+PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Profile")
+# Share of the other requests that are profiled, from 0 to 1.
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+# Seconds between two samples of the stack.
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.001"))
+# "speedscope" or "html".
+PROFILING_FORMAT = os.getenv("PROFILING_FORMAT", "speedscope")
+
+FILE_EXTENSIONS = {"speedscope": "speedscope.json", "html": "html"}
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests picked by header or sampling."""
+
+    def __init__(self, app) -> None:
+        # Only imported when profiling is on, so it is an optional dependency.
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+        if PROFILING_FORMAT not in FILE_EXTENSIONS:
+            raise ValueError(f"Unknown PROFILING_FORMAT: {PROFILING_FORMAT}")
+
+        self.app = app
+        self.profiler_class = Profiler
+        self.renderer_class = (
+            SpeedscopeRenderer if PROFILING_FORMAT == "speedscope" else HTMLRenderer
+        )
+        self.header = PROFILING_HEADER.lower().encode()
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        file_name = _file_name(scope)
+
+        async def send_with_file_name(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (self.header, file_name.encode()),
+                ]
+            await send(message)
+
+        # In async mode only this request's task is sampled, and its awaits
+        # are timed rather than skipped.
+        profiler = self.profiler_class(
+            interval=PROFILING_INTERVAL, async_mode="enabled"
+        )
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_file_name)
+        finally:
+            profiler.stop()
+            await run_in_threadpool(self._write, profiler, file_name)
+
+    def _wanted(self, scope) -> bool:
+        if any(name == self.header for name, _ in scope["headers"]):
+            return True
+
+        return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+    def _write(self, profiler, file_name: str) -> None:
+        output = profiler.output(self.renderer_class())
+        with open(os.path.join(PROFILING_DIR, file_name), "w") as file:
+            file.write(output)
+
+
+def _file_name(scope) -> str:
+    started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    extension = FILE_EXTENSIONS[PROFILING_FORMAT]
+    return (
+        f"{started}-{scope['method']}-{path[:80]}-{uuid.uuid4().hex[:8]}.{extension}"
+    )
@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional, Sequence
+import itertools
+import threading
+import time
+
+
+class ReplicaSet:
+    """Round-robin choice among replica URLs, skipping unhealthy ones.
+
+    A replica reported down is skipped for ``retry_interval`` seconds, after
+    which it is tried again. Thread-safe, as the sync DB picks from the
+    threadpool.
+    """
+
+    def __init__(self, urls: Sequence[str], retry_interval: float) -> None:
+        self.urls: List[str] = list(urls)
+        self.retry_interval = retry_interval
+        self.down_until: Dict[str, float] = {}
+        self.failures = 0
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[str]:
+        """Return the next healthy replica, or None if there is none."""
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._next)
+            for offset in range(len(self.urls)):
+                url = self.urls[(start + offset) % len(self.urls)]
+                if self.down_until.get(url, 0) <= now:
+                    return url
+
+        return None
+
+    def mark_down(self, url: str) -> None:
+        with self._lock:
+            self.down_until[url] = time.monotonic() + self.retry_interval
+            self.failures += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": len(self.urls),
+            "healthy": sum(self.down_until.get(url, 0) <= now for url in self.urls),
+            "failures": self.failures,
+        }
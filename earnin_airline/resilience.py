@@ -0,0 +1,158 @@
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Set, TypeVar
+import asyncio
+import math
+import random
+import time
+
+
+T = TypeVar("T")
+
+
+class CircuitOpen(Exception):
+    """The circuit breaker rejected the call without trying it."""
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive failures.
+
+    Once open, calls are rejected for ``reset_timeout`` seconds. Then a single
+    trial call is let through (half-open): its success closes the circuit, its
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def release(self) -> None:
+        """Forget a call that ended without an outcome, e.g. cancelled."""
+        self.trial_in_flight = False
+
+    async def call(self, fn: Callable[[], Awaitable[T]], is_failure) -> T:
+        """Run ``fn`` if the circuit allows it, counting exceptions matching
+        ``is_failure`` as failures."""
+        if not self.allow():
+            raise CircuitOpen()
+
+        try:
+            result = await fn()
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.release()
+            raise
+        except BaseException:
+            self.release()
+            raise
+
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyWindow:
+    """Latencies of the last ``size`` successful calls, for percentiles."""
+
+    def __init__(self, size: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.samples:
+            return None
+
+        ordered = sorted(self.samples)
+        index = math.ceil(percent / 100 * len(ordered)) - 1
+        return ordered[max(index, 0)]
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+    """Await ``fn()``, starting a second ``fn()`` if the first has not finished
+    after ``delay`` seconds, and return whichever succeeds first.
+
+    The slower call is cancelled. If both fail, the last error is raised.
+    """
+    first = asyncio.ensure_future(fn())
+    if delay is None:
+        return await first
+
+    pending: Set[asyncio.Future] = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            pending.add(asyncio.ensure_future(fn()))
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+        raise error
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def retry(
+    fn: Callable[[], Awaitable[T]], retries: int, backoff: float, is_retryable
+) -> T:
+    """Call ``fn`` up to ``retries`` more times while it raises a retryable
+    error, sleeping a random time up to ``backoff * 2 ** attempt`` in between
+    (full jitter)."""
+    for attempt in range(retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+
+        await asyncio.sleep(random.uniform(0, backoff * 2**attempt))
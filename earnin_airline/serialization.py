@@ -0,0 +1,62 @@
+"""Encoding of list responses straight to JSON-ready values.
+
+The list endpoints skip building one pydantic model per row and FastAPI's
+re-validation of the response; the output matches the dto models field for
+field, so those remain the documented schema.
+"""
+from datetime import datetime
+from typing import Any, Dict, List
+
+import orjson
+
+from . import timezone
+
+
+def isoformat(value: datetime) -> str:
+    # pydantic writes a zero UTC offset as "Z"; keep responses identical.
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        return text[:-6] + "Z"
+    return text
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def flights_to_json(records) -> List[Dict[str, Any]]:
+    """Encode flights like ``dto.FlightResponse``."""
+    departure_times = timezone.apply_timezone_bulk(
+        [record.departure_time for record in records],
+        [record.departure_timezone for record in records],
+    )
+    arrival_times = timezone.apply_timezone_bulk(
+        [record.arrival_time for record in records],
+        [record.arrival_timezone for record in records],
+    )
+    return [
+        {
+            "id": record.id,
+            "departure_time": isoformat(departure_time),
+            "arrival_time": isoformat(arrival_time),
+            "departure_airport": record.departure_airport,
+            "arrival_airport": record.arrival_airport,
+        }
+        for record, departure_time, arrival_time in zip(
+            records, departure_times, arrival_times
+        )
+    ]
+
+
+def passengers_to_json(records) -> List[Dict[str, Any]]:
+    """Encode passengers like ``dto.PassengerResponse``."""
+    return [
+        {
+            "flight_id": record.flight_id,
+            "customer_id": record.customer_id,
+            "passport_id": record.passport_id,
+            "first_name": record.first_name,
+            "last_name": record.last_name,
+        }
+        for record in records
+    ]
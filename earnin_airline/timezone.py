@@ -1,7 +1,60 @@
 from datetime import datetime
-from zoneinfo import ZoneInfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import os
+
+
+# Max resolved zones kept. A schedule uses a few hundred zones at most.
+ZONE_CACHE_SIZE = int(os.getenv("ZONE_CACHE_SIZE", "1024"))
+
+
+class InvalidTimezone(ValueError):
+    pass
+
+
+@lru_cache(maxsize=ZONE_CACHE_SIZE)
+def get_zone(zone_name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(zone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise InvalidTimezone(zone_name)
+
+
+def validate_zones(zone_names: Iterable[str]) -> List[str]:
+    """Resolve every distinct zone name; return the ones that are not valid."""
+    invalid = []
+    for zone_name in set(zone_names):
+        try:
+            get_zone(zone_name)
+        except InvalidTimezone:
+            invalid.append(zone_name)
+
+    return sorted(invalid)
 
 
 def apply_timezone(datetime_as_utc: datetime, zone_name: str):
-    fixed_tz = datetime_as_utc.replace(tzinfo=ZoneInfo("UTC"))
-    return fixed_tz.astimezone(ZoneInfo(zone_name))
+    # Same as astimezone() from UTC, minus its round trip through utcoffset().
+    zone = get_zone(zone_name)
+    return zone.fromutc(datetime_as_utc.replace(tzinfo=zone))
+
+
+def apply_timezone_bulk(
+    datetimes_as_utc: Sequence[datetime], zone_names: Sequence[str]
+) -> List[datetime]:
+    """Convert a column of UTC datetimes, each to the zone at the same index.
+
+    Rows are grouped by zone so every zone is resolved once per call.
+    """
+    indexes_by_zone: Dict[str, List[int]] = {}
+    for index, zone_name in enumerate(zone_names):
+        indexes_by_zone.setdefault(zone_name, []).append(index)
+
+    converted: List[datetime] = [None] * len(datetimes_as_utc)
+    for zone_name, indexes in indexes_by_zone.items():
+        zone = get_zone(zone_name)
+        fromutc = zone.fromutc
+        for index in indexes:
+            converted[index] = fromutc(datetimes_as_utc[index].replace(tzinfo=zone))
+
+    return converted
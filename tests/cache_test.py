@@ -0,0 +1,87 @@
+"""
+Test Scenario 22: Cache and coalesce lookups in process
+Expected Result: The cache keeps the most recently used entries up to its size, drops entries
+once their TTL has passed, and concurrent calls for a key share one call, its result or error.
+"""
+import asyncio
+import time
+
+import pytest
+from earnin_airline.cache import MISSING, SingleFlight, TTLCache
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    """
+    Test that a full cache evicts the entry used least recently, not the oldest one.
+    """
+    cache = TTLCache(2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3, 60)
+
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_negative_result_expires() -> None:
+    """
+    Test that a cached None is a hit until its shorter TTL passes, and a miss afterwards.
+    """
+    cache = TTLCache(10)
+    cache.set("unknown", None, 0.05)
+    cache.set("known", "detail", 60)
+    assert cache.get("unknown") is None
+
+    time.sleep(0.06)
+
+    assert cache.get("unknown") is MISSING
+    assert cache.get("known") == "detail"
+    assert cache.stats()["expirations"] == 1
+
+
+async def test_concurrent_calls_share_one_result() -> None:
+    """
+    Test that calls for a key made while one is in flight await it instead of calling again.
+    """
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def lookup() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "detail"
+
+    results = await asyncio.gather(*(single_flight.do("PP022", lookup) for _ in range(3)))
+
+    assert results == ["detail"] * 3
+    assert (calls, single_flight.coalesced) == (1, 2)
+    assert single_flight.calls == {}
+
+
+async def test_concurrent_calls_share_one_error() -> None:
+    """
+    Test that every caller of a failed call receives its error, and the next call runs again.
+    """
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def lookup() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("lookup failed")
+
+    results = await asyncio.gather(
+        *(single_flight.do("PP022", lookup) for _ in range(3)), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["lookup failed"] * 3
+    assert calls == 1
+
+    with pytest.raises(RuntimeError):
+        await single_flight.do("PP022", lookup)
+    assert calls == 2
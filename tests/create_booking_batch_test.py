@@ -0,0 +1,85 @@
+"""
+Test Scenario 8: Create a group booking with a single batch request
+Expected Result: Valid passengers are booked in one call, invalid ones are reported per item
+without affecting the rest of the batch.
+"""
+import httpx
+from earnin_airline.db import MAX_BATCH_SIZE
+from tests.conftest import (
+    get_passengers,
+    find_passenger_by_passport_id,
+    assert_status_code,
+    assert_booking_response
+)
+
+
+def test_create_booking_batch(api_client: httpx.Client) -> None:
+    """
+    Test booking several passengers at once.
+    Each passport is verified via Passport API and reported with its own status code.
+    """
+    # Use test flight from schema.sql (Test Scenario 8)
+    flight_id = "AA008"
+
+    # Using static mappings from create_booking_batch_first.json and create_booking_batch_second.json,
+    # PP002 from create_booking_invalid.json returns Jane Smith (intentional mismatch)
+    # and PP008X has no mapping, so the Passport API returns 404.
+    batch_data = {
+        "passengers": [
+            {"passport_id": "PP008A", "first_name": "Olivia", "last_name": "Martin"},
+            {"passport_id": "PP002", "first_name": "John", "last_name": "Doe"},
+            {"passport_id": "PP008B", "first_name": "Noah", "last_name": "Garcia"},
+            {"passport_id": "PP008X", "first_name": "Ghost", "last_name": "Passenger"},
+            {"passport_id": "PP008A", "first_name": "Olivia", "last_name": "Martin"},
+        ]
+    }
+
+    response = api_client.post(f"/flights/{flight_id}/passengers/batch", json=batch_data)
+    assert_status_code(response, 200)
+
+    results = response.json()["results"]
+    assert [result["status_code"] for result in results] == [200, 400, 200, 400, 400]
+    assert_booking_response(results[0]["passenger"], flight_id, "PP008A", "Olivia", "Martin")
+    assert_booking_response(results[2]["passenger"], flight_id, "PP008B", "Noah", "Garcia")
+    assert "Firstname or Lastname is mismatch" in results[1]["detail"]
+    assert results[3]["detail"] == "Passport not found."
+
+    # Only the valid passengers are booked
+    passengers = get_passengers(api_client, flight_id)
+    assert len(passengers) == 2
+    assert find_passenger_by_passport_id(passengers, "PP008A") is not None
+    assert find_passenger_by_passport_id(passengers, "PP008B") is not None
+
+    # Booking the same passengers again reports them as already booked
+    response = api_client.post(
+        f"/flights/{flight_id}/passengers/batch",
+        json={"passengers": batch_data["passengers"][:1]}
+    )
+    assert_status_code(response, 200)
+    assert response.json()["results"][0]["status_code"] == 409
+
+
+def test_create_booking_batch_with_unknown_flight(api_client: httpx.Client) -> None:
+    """
+    Test that a batch for a flight that does not exist is rejected as a whole.
+    """
+    response = api_client.post(
+        "/flights/ZZ999/passengers/batch",
+        json={"passengers": [{"passport_id": "PP008A", "first_name": "Olivia", "last_name": "Martin"}]}
+    )
+    assert_status_code(response, 404)
+
+
+def test_create_booking_batch_size_is_bounded(api_client: httpx.Client) -> None:
+    """
+    Test that an empty batch and one larger than MAX_BATCH_SIZE are rejected.
+    """
+    passenger = {"passport_id": "PP008A", "first_name": "Olivia", "last_name": "Martin"}
+    for passengers in ([], [passenger] * (MAX_BATCH_SIZE + 1)):
+        response = api_client.post(
+            "/flights/AA008/passengers/batch",
+            json={"passengers": passengers}
+        )
+        assert_status_code(response, 422)
+
+    assert get_passengers(api_client, "AA008") == []
@@ -6,7 +6,8 @@ import httpx
 from tests.conftest import (
     find_passenger_by_passport_id,
     get_passengers,
-    assert_mismatch_error
+    assert_mismatch_error,
+    assert_status_code
 )
 
 
@@ -47,3 +48,18 @@ def test_create_booking_with_invalid_customer(api_client: httpx.Client) -> None:
     # Find our booking - should NOT exist
     our_booking = find_passenger_by_passport_id(passengers, passport_id)
     assert our_booking is None, "Booking should NOT be created when names don't match"
+
+
+def test_create_booking_with_invalid_customer_and_flight(api_client: httpx.Client) -> None:
+    """
+    Test that an unknown flight is reported before a passport mismatch,
+    although both are checked concurrently.
+    """
+    # Same mismatched passport as above (create_booking_invalid.json)
+    response = api_client.post(
+        "/flights/XX404/passengers",
+        json={"passport_id": "PP002", "first_name": "John", "last_name": "Doe"}
+    )
+
+    assert_status_code(response, 404)
+    assert response.json()["detail"] == "Flight:XX404 not found."
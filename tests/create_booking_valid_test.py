@@ -8,7 +8,8 @@ from tests.conftest import (
     get_passengers,
     find_passenger_by_passport_id,
     assert_booking_response,
-    assert_passenger_fields_match
+    assert_passenger_fields_match,
+    assert_status_code
 )
 
 
@@ -46,3 +47,21 @@ def test_create_booking_with_valid_customer(api_client: httpx.Client) -> None:
         first_name=first_name,
         last_name=last_name
     )
+
+
+def test_create_booking_twice_is_conflict(api_client: httpx.Client) -> None:
+    """
+    Test that booking the same passport on the same flight again is rejected
+    and does not create a second customer.
+    """
+    flight_id = "AA001"
+    booking = create_booking(api_client, flight_id, "PP001", "Sarah", "Johnson")
+
+    response = api_client.post(
+        f"/flights/{flight_id}/passengers",
+        json={"passport_id": "PP001", "first_name": "Sarah", "last_name": "Johnson"}
+    )
+    assert_status_code(response, 409)
+
+    passengers = get_passengers(api_client, flight_id)
+    assert [passenger["customer_id"] for passenger in passengers] == [booking["customer_id"]]
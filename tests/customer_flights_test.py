@@ -0,0 +1,43 @@
+"""
+Test Scenario 17: Look up the flights of a customer by customer ID or passport
+Expected Result: Every flight the customer is booked on is returned with localized times,
+and an unknown customer or passport returns 404.
+"""
+import httpx
+from tests.conftest import (
+    create_booking,
+    find_flight_by_id,
+    assert_status_code
+)
+
+
+def test_list_customer_flights(api_client: httpx.Client) -> None:
+    """
+    Test listing the bookings of a customer booked on two flights.
+    """
+    # Reusing the static mapping of Test Scenario 1 (create_booking_valid.json)
+    booking = create_booking(api_client, "AA001", "PP001", "Sarah", "Johnson")
+    create_booking(api_client, "AA004", "PP001", "Sarah", "Johnson")
+    customer_id = booking["customer_id"]
+
+    response = api_client.get(f"/customers/{customer_id}/flights")
+    assert_status_code(response, 200)
+    flights = response.json()["flights"]
+    assert [flight["id"] for flight in flights] == ["AA001", "AA004"]
+
+    # Times are localized like in GET /flights
+    listed = api_client.get("/flights", params={"limit": 1000}).json()["flights"]
+    assert flights[1] == find_flight_by_id(listed, "AA004")
+
+    response = api_client.get("/passports/PP001/flights", params={"limit": 1})
+    assert_status_code(response, 200)
+    assert [flight["id"] for flight in response.json()["flights"]] == ["AA001"]
+    assert response.json()["next_cursor"] is not None
+
+
+def test_list_flights_of_unknown_customer(api_client: httpx.Client) -> None:
+    """
+    Test that unknown customers and passports are reported as not found.
+    """
+    assert_status_code(api_client.get("/customers/999999/flights"), 404)
+    assert_status_code(api_client.get("/passports/PP404/flights"), 404)
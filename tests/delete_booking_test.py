@@ -33,6 +33,12 @@ def test_delete_valid_booking(api_client: httpx.Client) -> None:
     booking_before = find_passenger_by_customer_id(passengers_before, customer_id)
     assert booking_before is not None, "Booking should exist before deletion"
     
+    # A booking is only found on its own flight
+    wrong_flight_response = api_client.delete(
+        f"/flights/AA001/passengers/{customer_id}"
+    )
+    assert_status_code(wrong_flight_response, 404)
+
     # Step 2: Delete the booking
     delete_response = api_client.delete(
         f"/flights/{flight_id}/passengers/{customer_id}"
@@ -0,0 +1,62 @@
+"""
+Test Scenario 14: Read passenger counts of flights
+Expected Result: The stats of a flight count its passengers as they are booked and deleted,
+and the bulk endpoint returns the stats of every requested flight that exists.
+"""
+import httpx
+from tests.conftest import (
+    assert_status_code
+)
+
+
+def get_passenger_count(api_client: httpx.Client, flight_id: str) -> int:
+    """
+    Return the passenger count from the stats of a flight.
+    """
+    response = api_client.get(f"/flights/{flight_id}/stats")
+    assert_status_code(response, 200)
+    assert response.json()["flight_id"] == flight_id
+    return response.json()["passenger_count"]
+
+
+def test_flight_stats_count_passengers(api_client: httpx.Client) -> None:
+    """
+    Test that the passenger count follows bookings and deletions.
+    """
+    # Use test flight from schema.sql (Test Scenario 14)
+    flight_id = "AA014"
+    assert get_passenger_count(api_client, flight_id) == 0
+
+    # Reusing the static mappings of Test Scenario 9 (list_passengers_paginated_*.json)
+    batch_data = {
+        "passengers": [
+            {"passport_id": "PP009A", "first_name": "Liam", "last_name": "Clark"},
+            {"passport_id": "PP009B", "first_name": "Emma", "last_name": "Lewis"},
+            {"passport_id": "PP009C", "first_name": "Ava", "last_name": "Walker"},
+        ]
+    }
+    response = api_client.post(f"/flights/{flight_id}/passengers/batch", json=batch_data)
+    assert_status_code(response, 200)
+    assert get_passenger_count(api_client, flight_id) == 3
+
+    customer_id = response.json()["results"][0]["passenger"]["customer_id"]
+    response = api_client.delete(f"/flights/{flight_id}/passengers/{customer_id}")
+    assert_status_code(response, 200)
+    assert get_passenger_count(api_client, flight_id) == 2
+
+
+def test_flight_stats_of_many_flights(api_client: httpx.Client) -> None:
+    """
+    Test reading the stats of several flights at once.
+    """
+    response = api_client.get(
+        "/flights/stats", params=[("flight_id", "AA014"), ("flight_id", "XX404"), ("flight_id", "AA001")]
+    )
+    assert_status_code(response, 200)
+    assert response.json()["flights"] == [
+        {"flight_id": "AA014", "passenger_count": 0},
+        {"flight_id": "AA001", "passenger_count": 0},
+    ]
+
+    assert_status_code(api_client.get("/flights/XX404/stats"), 404)
+    assert_status_code(api_client.get("/flights/stats"), 422)
@@ -0,0 +1,136 @@
+"""
+Test Scenario 12: Retry booking writes with the same Idempotency-Key
+Expected Result: A retried request is not performed again; the response of the first one is replayed.
+A key reused for a different request is rejected.
+"""
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from earnin_airline import idempotency
+from earnin_airline.db import AsyncDB, async_url
+from earnin_airline.idempotency import (
+    IdempotencyKeyInProgress,
+    IdempotencyStore,
+    fingerprint,
+)
+from tests.conftest import (
+    DATABASE_URL,
+    get_passengers,
+    assert_booking_response,
+    assert_status_code
+)
+
+FLIGHT_ID = "AA012"
+# Using static mapping from idempotent_booking.json (Test Scenario 12)
+BOOKING_DATA = {"passport_id": "PP012", "first_name": "Mia", "last_name": "Turner"}
+
+
+def test_create_booking_retried_with_idempotency_key(api_client: httpx.Client) -> None:
+    """
+    Test that retrying a booking with the same key replays the first response.
+    """
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = api_client.post(f"/flights/{FLIGHT_ID}/passengers", json=BOOKING_DATA, headers=headers)
+    assert_status_code(first, 200)
+    assert "idempotent-replayed" not in first.headers
+    assert_booking_response(first.json(), FLIGHT_ID, "PP012", "Mia", "Turner")
+
+    # Without the key the same booking would be a 409
+    retry = api_client.post(f"/flights/{FLIGHT_ID}/passengers", json=BOOKING_DATA, headers=headers)
+    assert_status_code(retry, 200)
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+
+    assert len(get_passengers(api_client, FLIGHT_ID)) == 1
+
+
+def test_idempotency_key_reused_for_another_request(api_client: httpx.Client) -> None:
+    """
+    Test that a key cannot be reused with a different body or route.
+    """
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    response = api_client.post(f"/flights/{FLIGHT_ID}/passengers", json=BOOKING_DATA, headers=headers)
+    assert_status_code(response, 200)
+    customer_id = response.json()["customer_id"]
+
+    other_body = dict(BOOKING_DATA, first_name="Someone")
+    response = api_client.post(f"/flights/{FLIGHT_ID}/passengers", json=other_body, headers=headers)
+    assert_status_code(response, 422)
+
+    response = api_client.delete(f"/flights/{FLIGHT_ID}/passengers/{customer_id}", headers=headers)
+    assert_status_code(response, 422)
+
+
+def test_delete_booking_retried_with_idempotency_key(api_client: httpx.Client) -> None:
+    """
+    Test that retrying a deletion replays its success instead of returning 404.
+    """
+    response = api_client.post(f"/flights/{FLIGHT_ID}/passengers", json=BOOKING_DATA)
+    assert_status_code(response, 200)
+    customer_id = response.json()["customer_id"]
+
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    for _ in range(2):
+        response = api_client.delete(f"/flights/{FLIGHT_ID}/passengers/{customer_id}", headers=headers)
+        assert_status_code(response, 200)
+
+    assert get_passengers(api_client, FLIGHT_ID) == []
+
+
+async def test_concurrent_retries_on_two_workers_write_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that a retry reaching another worker waits for the first request instead of writing,
+    gives up with IdempotencyKeyInProgress after the wait timeout, and runs the write again once
+    a server error released the key.
+    """
+    db = AsyncDB(async_url(DATABASE_URL))
+    # Each store has its own cache and single flight, like two workers.
+    workers = [IdempotencyStore(db), IdempotencyStore(db)]
+    request_fingerprint = fingerprint("POST", f"/flights/{FLIGHT_ID}/passengers")
+    calls = 0
+
+    async def write(delay: float = 0.2):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay)
+        return 200, '{"booked": true}'
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("server error")
+
+    try:
+        key = str(uuid.uuid4())
+        results = await asyncio.gather(
+            *(worker.run(key, request_fingerprint, write) for worker in workers)
+        )
+        assert calls == 1
+        assert [response.body for response, _ in results] == ['{"booked": true}'] * 2
+        assert sorted(replayed for _, replayed in results) == [False, True]
+
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_TIMEOUT", 0.1)
+        key = str(uuid.uuid4())
+        first = asyncio.create_task(
+            workers[0].run(key, request_fingerprint, lambda: write(0.5))
+        )
+        await asyncio.sleep(0.05)
+        with pytest.raises(IdempotencyKeyInProgress):
+            await workers[1].run(key, request_fingerprint, write)
+        await first
+        assert calls == 2
+
+        key = str(uuid.uuid4())
+        with pytest.raises(RuntimeError):
+            await workers[0].run(key, request_fingerprint, fail)
+        response, replayed = await workers[1].run(key, request_fingerprint, write)
+        assert (response.status_code, replayed) == (200, False)
+        assert calls == 4
+    finally:
+        await db.dispose()
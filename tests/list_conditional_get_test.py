@@ -0,0 +1,83 @@
+"""
+Test Scenario 11: Poll flight and passenger lists with If-None-Match
+Expected Result: Unchanged lists return 304 Not Modified for the ETag of the previous response,
+and a booking change invalidates the passenger list ETag of its flight.
+"""
+import httpx
+from tests.conftest import (
+    create_booking,
+    get_passengers,
+    assert_status_code
+)
+
+
+def test_list_flights_not_modified(api_client: httpx.Client) -> None:
+    """
+    Test that polling an unchanged flight list returns 304.
+    """
+    response = api_client.get("/flights")
+    assert_status_code(response, 200)
+    etag = response.headers["etag"]
+
+    not_modified = api_client.get("/flights", headers={"If-None-Match": etag})
+    assert_status_code(not_modified, 304)
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+    # Another page of the same list has its own ETag
+    other_page = api_client.get("/flights", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert_status_code(other_page, 200)
+    assert other_page.headers["etag"] != etag
+
+
+def test_list_passengers_not_modified_until_booking_changes(api_client: httpx.Client) -> None:
+    """
+    Test that the passenger list ETag changes when a passenger is booked or deleted.
+    """
+    # Use test flight from schema.sql (Test Scenario 11)
+    flight_id = "AA011"
+    path = f"/flights/{flight_id}/passengers"
+
+    response = api_client.get(path)
+    assert_status_code(response, 200)
+    empty_etag = response.headers["etag"]
+    assert_status_code(api_client.get(path, headers={"If-None-Match": empty_etag}), 304)
+
+    # Reuses the passport of Test Scenario 1 (create_booking_valid.json)
+    booking = create_booking(api_client, flight_id, "PP001", "Sarah", "Johnson")
+
+    response = api_client.get(path, headers={"If-None-Match": empty_etag})
+    assert_status_code(response, 200)
+    assert len(response.json()["passengers"]) == 1
+    booked_etag = response.headers["etag"]
+    assert booked_etag != empty_etag
+    assert_status_code(api_client.get(path, headers={"If-None-Match": booked_etag}), 304)
+
+    delete_response = api_client.delete(f"{path}/{booking['customer_id']}")
+    assert_status_code(delete_response, 200)
+
+    response = api_client.get(path, headers={"If-None-Match": booked_etag})
+    assert_status_code(response, 200)
+    assert get_passengers(api_client, flight_id) == []
+
+
+def test_list_flights_etag_depends_on_representation(api_client: httpx.Client) -> None:
+    """
+    Test that JSON and NDJSON lists have their own ETags and both vary on Accept.
+    """
+    response = api_client.get("/flights")
+    assert_status_code(response, 200)
+    assert response.headers["vary"] == "Accept"
+    etag = response.headers["etag"]
+
+    not_modified = api_client.get("/flights", headers={"If-None-Match": etag})
+    assert_status_code(not_modified, 304)
+    assert not_modified.headers["vary"] == "Accept"
+
+    # The JSON ETag does not validate the NDJSON stream
+    stream = api_client.get(
+        "/flights", headers={"Accept": "application/x-ndjson", "If-None-Match": etag}
+    )
+    assert_status_code(stream, 200)
+    assert stream.headers["vary"] == "Accept"
+    assert stream.headers["etag"] != etag
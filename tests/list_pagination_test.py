@@ -0,0 +1,92 @@
+"""
+Test Scenario 9: Page through flights and passengers with a cursor
+Expected Result: Following next_cursor returns every row exactly once, in key order,
+and the last page has no next_cursor.
+"""
+from typing import Any, Dict, List, Optional
+
+import httpx
+from tests.conftest import (
+    assert_status_code
+)
+
+
+def fetch_all_pages(api_client: httpx.Client, path: str, items_key: str,
+    limit: int) -> List[List[Dict[str, Any]]]:
+    """
+    Follow next_cursor from the first page to the last and return every page.
+    """
+    pages: List[List[Dict[str, Any]]] = []
+    cursor: Optional[str] = None
+    while True:
+        params: Dict[str, Any] = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+
+        response = api_client.get(path, params=params)
+        assert_status_code(response, 200)
+
+        body = response.json()
+        assert len(body[items_key]) <= limit
+        pages.append(body[items_key])
+
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_list_flights_paginated(api_client: httpx.Client) -> None:
+    """
+    Test paging through all flights two at a time.
+    """
+    pages = fetch_all_pages(api_client, "/flights", "flights", limit=2)
+    flight_ids = [flight["id"] for page in pages for flight in page]
+
+    assert flight_ids == sorted(flight_ids), "Flights should be ordered by ID"
+    assert len(flight_ids) == len(set(flight_ids)), "No flight should appear twice"
+
+    response = api_client.get("/flights", params={"limit": 1000})
+    assert_status_code(response, 200)
+    assert flight_ids == [flight["id"] for flight in response.json()["flights"]]
+
+
+def test_list_passengers_paginated(api_client: httpx.Client) -> None:
+    """
+    Test paging through the passengers of a flight one at a time.
+    """
+    # Use test flight from schema.sql (Test Scenario 9)
+    flight_id = "AA009"
+
+    # Using static mappings from list_passengers_paginated_*.json (Test Scenario 9)
+    batch_data = {
+        "passengers": [
+            {"passport_id": "PP009A", "first_name": "Liam", "last_name": "Clark"},
+            {"passport_id": "PP009B", "first_name": "Emma", "last_name": "Lewis"},
+            {"passport_id": "PP009C", "first_name": "Ava", "last_name": "Walker"},
+        ]
+    }
+    response = api_client.post(f"/flights/{flight_id}/passengers/batch", json=batch_data)
+    assert_status_code(response, 200)
+
+    pages = fetch_all_pages(api_client, f"/flights/{flight_id}/passengers", "passengers", limit=1)
+    assert [len(page) for page in pages] == [1, 1, 1]
+
+    customer_ids = [passenger["customer_id"] for page in pages for passenger in page]
+    assert customer_ids == sorted(customer_ids), "Passengers should be ordered by customer ID"
+    assert {passenger["passport_id"] for page in pages for passenger in page} == {
+        "PP009A", "PP009B", "PP009C"
+    }
+
+
+def test_list_passengers_with_invalid_cursor(api_client: httpx.Client) -> None:
+    """
+    Test that a malformed cursor, or one issued for another flight, is rejected.
+    """
+    response = api_client.get("/flights/AA009/passengers", params={"cursor": "not-a-cursor"})
+    assert_status_code(response, 400)
+
+    flights_page = api_client.get("/flights", params={"limit": 1}).json()
+    response = api_client.get(
+        "/flights/AA009/passengers", params={"cursor": flights_page["next_cursor"]}
+    )
+    assert_status_code(response, 400)
@@ -0,0 +1,59 @@
+"""
+Test Scenario 10: Export flights and passengers as a newline-delimited JSON stream
+Expected Result: With "Accept: application/x-ndjson" every row is returned, one JSON object per line,
+with the same content as the paginated list.
+"""
+import json
+from typing import Any, Dict, List
+
+import httpx
+from tests.conftest import (
+    create_booking,
+    assert_status_code,
+    assert_passenger_fields_match
+)
+
+NDJSON_HEADERS = {"Accept": "application/x-ndjson"}
+
+
+def parse_ndjson(response: httpx.Response) -> List[Dict[str, Any]]:
+    """
+    Parse a newline-delimited JSON response body into a list of objects.
+    """
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_flights(api_client: httpx.Client) -> None:
+    """
+    Test exporting all flights as a stream.
+    """
+    response = api_client.get("/flights", headers=NDJSON_HEADERS)
+    assert_status_code(response, 200)
+    streamed = parse_ndjson(response)
+
+    listed = api_client.get("/flights", params={"limit": 1000}).json()["flights"]
+    assert streamed == listed
+
+
+def test_stream_passengers(api_client: httpx.Client) -> None:
+    """
+    Test exporting the passengers of a flight as a stream.
+    """
+    # Reuses the flight and passport of Test Scenario 1 (create_booking_valid.json)
+    flight_id = "AA001"
+    booking = create_booking(api_client, flight_id, "PP001", "Sarah", "Johnson")
+
+    response = api_client.get(f"/flights/{flight_id}/passengers", headers=NDJSON_HEADERS)
+    assert_status_code(response, 200)
+    streamed = parse_ndjson(response)
+
+    assert len(streamed) == 1
+    assert_passenger_fields_match(
+        streamed[0],
+        flight_id=flight_id,
+        customer_id=booking["customer_id"],
+        passport_id="PP001",
+        first_name="Sarah",
+        last_name="Johnson"
+    )
@@ -0,0 +1,93 @@
+"""
+Test Scenario 15: Load a flight schedule file with the loader CLI
+Expected Result: Every flight of the file is upserted into the flights table,
+and a file with an unknown timezone is rejected before anything is written.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator
+
+import asyncpg
+import pytest
+from earnin_airline.db import asyncpg_dsn
+from earnin_airline.loader import InvalidSchedule, load_schedule
+from tests.conftest import DATABASE_URL
+
+FLIGHT = {
+    "id": "LD0001",
+    "departure_time": "2025-03-01T09:00:00Z",
+    "arrival_time": "2025-03-01T18:30:00+07:00",
+    "departure_airport": "LHR",
+    "arrival_airport": "BKK",
+    "departure_timezone": "Europe/London",
+    "arrival_timezone": "Asia/Bangkok",
+}
+
+
+@pytest.fixture
+async def dsn() -> AsyncIterator[str]:
+    """
+    DSN of the test database; flights loaded by a test are deleted afterwards.
+    """
+    dsn = asyncpg_dsn(DATABASE_URL)
+    yield dsn
+
+    connection = await asyncpg.connect(dsn)
+    try:
+        await connection.execute("DELETE FROM flights WHERE id LIKE 'LD%'")
+    finally:
+        await connection.close()
+
+
+def write_ndjson(path: Path, *flights: dict) -> str:
+    path.write_text("".join(json.dumps(flight) + "\n" for flight in flights))
+    return str(path)
+
+
+async def test_load_schedule(tmp_path: Path, dsn: str) -> None:
+    """
+    Test loading new flights and updating one listed twice.
+    """
+    schedule = write_ndjson(
+        tmp_path / "schedule.ndjson",
+        FLIGHT,
+        dict(FLIGHT, id="LD0002", departure_airport="DMK"),
+        dict(FLIGHT, arrival_airport="HKT"),
+    )
+
+    report = await load_schedule(schedule, "ndjson", batch_size=2, dsn=dsn)
+    assert report.rows == 3
+
+    connection = await asyncpg.connect(dsn)
+    try:
+        rows = await connection.fetch("SELECT * FROM flights WHERE id LIKE 'LD%' ORDER BY id")
+    finally:
+        await connection.close()
+
+    assert [(row["id"], row["departure_airport"], row["arrival_airport"]) for row in rows] == [
+        ("LD0001", "LHR", "HKT"),
+        ("LD0002", "DMK", "BKK"),
+    ]
+    # Stored in UTC like the rest of the schedule
+    assert rows[0]["arrival_time"] == datetime(2025, 3, 1, 11, 30)
+
+
+async def test_load_schedule_with_unknown_timezone(tmp_path: Path, dsn: str) -> None:
+    """
+    Test that one unknown timezone rejects the whole file.
+    """
+    schedule = write_ndjson(
+        tmp_path / "schedule.ndjson",
+        FLIGHT,
+        dict(FLIGHT, id="LD0002", arrival_timezone="Asia/Atlantis"),
+    )
+
+    with pytest.raises(InvalidSchedule, match="Asia/Atlantis"):
+        await load_schedule(schedule, "ndjson", dsn=dsn)
+
+    connection = await asyncpg.connect(dsn)
+    try:
+        assert await connection.fetchval("SELECT count(*) FROM flights WHERE id LIKE 'LD%'") == 0
+    finally:
+        await connection.close()
@@ -0,0 +1,28 @@
+"""
+Test Scenario 21: Run a short load test of the API
+Expected Result: Every operation of the mix is sent at the target rate without errors,
+its latency percentiles are reported, and the scratch data is deleted afterwards.
+"""
+from sqlalchemy import create_engine, text
+
+from benchmarks.loadtest.runner import run
+from benchmarks.loadtest.workload import OPERATIONS
+from tests.conftest import DATABASE_URL
+
+
+def test_short_load_test() -> None:
+    """
+    Test a one-second run at 40 calls per second with a fast fake Passport API.
+    """
+    report = run(rate=40, duration=1, warmup=0, flights=2, passport_latency=0.001)
+
+    total = report["total"]
+    assert total["requests"] == 40
+    assert total["errors"] == 0
+    assert total["p50_ms"] <= total["p95_ms"] <= total["p99_ms"] <= total["max_ms"]
+    assert set(report["operations"]) <= set(OPERATIONS)
+    assert report["operations"]["create_booking"]["requests"] > 0
+
+    with create_engine(DATABASE_URL).connect() as connection:
+        assert connection.scalar(text("SELECT count(*) FROM flights WHERE id LIKE 'LOAD%'")) == 0
+        assert connection.scalar(text("SELECT count(*) FROM customers WHERE passport_id LIKE 'LT%'")) == 0
@@ -0,0 +1,58 @@
+"""
+Test Scenario 19: Scrape the Prometheus metrics of the API
+Expected Result: Request latency is reported per route and status, SQL statement time
+per DB method, and the connection pools and Passport API are reported.
+"""
+import httpx
+from earnin_airline.db import AsyncDB, async_url
+from earnin_airline.metrics import REGISTRY
+from tests.conftest import DATABASE_URL, assert_status_code
+
+
+def test_metrics_report_requests(api_client: httpx.Client) -> None:
+    """
+    Test that a request shows up under its route template and status.
+    """
+    assert_status_code(api_client.get("/flights/AA001/passengers"), 200)
+    assert_status_code(api_client.get("/flights/XX404/stats"), 404)
+
+    response = api_client.get("/metrics")
+    assert_status_code(response, 200)
+    assert response.headers["content-type"].startswith("text/plain")
+    metrics = response.text
+
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/flights/{flight_id}/passengers",status="200"}'
+    ) in metrics
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/flights/{flight_id}/stats",status="404"}'
+    ) in metrics
+    assert 'db_query_duration_seconds_count{method="list_passengers"}' in metrics
+    assert 'db_pool_connections_in_use{database="primary"}' in metrics
+    assert "# TYPE db_pool_checkout_duration_seconds histogram" in metrics
+    assert "# TYPE passport_api_request_duration_seconds histogram" in metrics
+
+
+async def test_sql_is_labelled_by_db_method() -> None:
+    """
+    Test that statements are timed under the DB method running them, streams included.
+    """
+    db = AsyncDB(async_url(DATABASE_URL), [])
+
+    def count(method: str) -> float:
+        return REGISTRY.get_sample_value(
+            "db_query_duration_seconds_count", {"method": method}
+        ) or 0
+
+    try:
+        before = count("stream_flights"), count("get_flight_stats")
+        async for _ in db.stream_flights():
+            pass
+        await db.get_flight_stats(["AA001"])
+
+        assert count("stream_flights") == before[0] + 1
+        assert count("get_flight_stats") == before[1] + 1
+    finally:
+        await db.dispose()
@@ -0,0 +1,114 @@
+"""
+Test Scenario 13: Passport API is slow or failing
+Expected Result: Failed lookups are retried, slow ones are hedged and bounded by a deadline,
+and repeated failures open a circuit that fails fast until the API recovers.
+"""
+import asyncio
+import time
+from typing import AsyncIterator
+
+import pytest
+from earnin_airline import passport
+from earnin_airline.resilience import CircuitBreaker, LatencyWindow
+from tests.passport_stub import PassportStub
+
+PASSPORTS = {"PP013": ("Lucas", "Hill")}
+
+
+@pytest.fixture
+async def stub(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[PassportStub]:
+    """
+    Point the passport client at a fresh stand-in server with fast, deterministic settings.
+    """
+    server = PassportStub(PASSPORTS)
+    monkeypatch.setattr(passport, "PASSPORT_API_URL", await server.start())
+    monkeypatch.setattr(passport, "PASSPORT_API_DEADLINE", 0.5)
+    monkeypatch.setattr(passport, "PASSPORT_API_RETRIES", 1)
+    monkeypatch.setattr(passport, "PASSPORT_API_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(passport, "PASSPORT_API_HEDGE_ENABLED", False)
+    monkeypatch.setattr(passport, "breaker", CircuitBreaker(2, 0.2))
+    monkeypatch.setattr(passport, "latencies", LatencyWindow(100))
+
+    yield server
+
+    await passport.close_session()
+    await server.stop()
+
+
+async def test_failed_request_is_retried(stub: PassportStub) -> None:
+    """
+    Test that a transient 503 is retried and the lookup succeeds.
+    """
+    stub.answers = [(503, 0)]
+
+    detail = await passport.lookup_passport_detail("PP013")
+
+    assert detail == passport.PassportDetail("PP013", "Lucas", "Hill")
+    assert stub.requests == 2
+
+
+async def test_lookup_is_bounded_by_deadline(stub: PassportStub) -> None:
+    """
+    Test that a hanging Passport API fails the lookup once the deadline is spent.
+    """
+    stub.answers = [(200, 1.0), (200, 1.0)]
+
+    started = time.monotonic()
+    with pytest.raises(passport.PassportAPIError):
+        await passport.lookup_passport_detail("PP013")
+
+    assert time.monotonic() - started < 1.0
+
+
+async def test_slow_request_is_hedged(stub: PassportStub, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that a second request is sent when the first is slower than usual, and the faster wins.
+    """
+    monkeypatch.setattr(passport, "PASSPORT_API_HEDGE_ENABLED", True)
+    monkeypatch.setattr(passport, "PASSPORT_API_HEDGE_MIN_SAMPLES", 5)
+    for _ in range(5):
+        passport.latencies.record(0.02)
+    stub.answers = [(200, 1.0)]
+
+    started = time.monotonic()
+    detail = await passport.lookup_passport_detail("PP013")
+
+    assert detail is not None
+    assert stub.requests == 2
+    assert time.monotonic() - started < 0.4
+
+
+async def test_circuit_opens_after_repeated_failures(stub: PassportStub) -> None:
+    """
+    Test that the circuit fails fast while open and closes after a successful trial.
+    """
+    stub.answers = [(500, 0)] * 4
+
+    for _ in range(2):
+        with pytest.raises(passport.PassportAPIError):
+            await passport.lookup_passport_detail("PP013")
+    assert passport.breaker.state == "open"
+
+    # Rejected without calling the Passport API
+    with pytest.raises(passport.PassportAPIError):
+        await passport.lookup_passport_detail("PP013")
+    assert stub.requests == 4
+
+    await asyncio.sleep(0.25)
+    assert await passport.lookup_passport_detail("PP013") is not None
+    assert passport.breaker.state == "closed"
+
+
+async def test_client_error_is_not_retried(stub: PassportStub) -> None:
+    """
+    Test that a 4xx other than 404 and 429 fails at once and leaves the circuit closed.
+    """
+    stub.answers = [(400, 0)] * 3
+
+    for _ in range(3):
+        with pytest.raises(passport.PassportAPIRejected):
+            await passport.lookup_passport_detail("PP013")
+
+    assert stub.requests == 3
+    assert passport.breaker.state == "closed"
+    assert passport.breaker.failures == 0
@@ -0,0 +1,63 @@
+"""
+Stand-in for the Passport API that injects latency and errors.
+
+Unlike the wiremock mappings it is started by the test itself, which scripts
+how each request is answered.
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# (status, delay in seconds) used when no fault is scripted for a request
+DEFAULT_ANSWER: Tuple[int, float] = (200, 0.0)
+
+
+class PassportStub:
+    """
+    Serve GET /passport for the given passports on a local port.
+
+    Each entry of ``answers`` scripts one request, in arrival order, as
+    ``(status, delay)``; requests beyond the script get ``DEFAULT_ANSWER``.
+    """
+
+    def __init__(self, passports: Dict[str, Tuple[str, str]]) -> None:
+        self.passports = passports
+        self.answers: List[Tuple[int, float]] = []
+        self.requests = 0
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/passport", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        index = self.requests
+        self.requests += 1
+        status, delay = self.answers[index] if index < len(self.answers) else DEFAULT_ANSWER
+        if delay:
+            await asyncio.sleep(delay)
+
+        if status != 200:
+            return web.Response(status=status, text="injected failure")
+
+        passport_id = (await request.json())["passport_id"]
+        if passport_id not in self.passports:
+            return web.Response(status=404)
+
+        first_name, last_name = self.passports[passport_id]
+        return web.json_response(
+            {"passport_id": passport_id, "first_name": first_name, "last_name": last_name}
+        )
@@ -0,0 +1,47 @@
+"""
+Test Scenario 20: Profile a single request on demand
+Expected Result: A request carrying the profiling header is profiled, awaits included, and
+its profile is written as speedscope JSON; other requests are served unprofiled.
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from earnin_airline import profiling
+from fastapi import FastAPI
+
+# An optional dependency, see requirements-dev.txt.
+pytest.importorskip("pyinstrument")
+
+app = FastAPI()
+
+
+@app.get("/slow")
+async def slow():
+    await asyncio.sleep(0.05)
+    return {"slow": True}
+
+
+async def test_request_with_header_is_profiled(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that only the request with the header is profiled and its profile is written.
+    """
+    monkeypatch.setattr(profiling, "PROFILING_DIR", str(tmp_path))
+    transport = httpx.ASGITransport(app=profiling.ProfilingMiddleware(app))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert "x-profile" not in (await client.get("/slow")).headers
+        response = await client.get("/slow", headers={"X-Profile": "1"})
+
+    assert response.json() == {"slow": True}
+    profile_path = tmp_path / response.headers["x-profile"]
+    assert [path.name for path in tmp_path.iterdir()] == [profile_path.name]
+
+    profile = json.loads(profile_path.read_text())
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert "slow" in frames
+    assert "[await]" in frames
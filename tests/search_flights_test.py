@@ -0,0 +1,78 @@
+"""
+Test Scenario 16: Search flights by airport and departure time
+Expected Result: Only flights of the requested route departing in the time window are returned,
+ordered by departure time, with the window read in UTC or in the departure airport's local time.
+"""
+import httpx
+from tests.conftest import (
+    assert_status_code
+)
+
+
+def search(api_client: httpx.Client, **params) -> httpx.Response:
+    response = api_client.get("/flights/search", params=params)
+    assert_status_code(response, 200)
+    return response
+
+
+def test_search_flights_by_route(api_client: httpx.Client) -> None:
+    """
+    Test searching the flights of a route, page by page.
+    """
+    # AA004 from schema.sql is the only flight departing from DMK (Test Scenario 4)
+    flights = search(api_client, departure_airport="DMK").json()["flights"]
+    assert [flight["id"] for flight in flights] == ["AA004"]
+
+    flights = search(api_client, departure_airport="DMK", arrival_airport="LHR").json()["flights"]
+    assert flights == []
+
+    # Every other test flight goes from LHR to BKK
+    first_page = search(api_client, departure_airport="LHR", arrival_airport="BKK", limit=2).json()
+    assert len(first_page["flights"]) == 2
+    second_page = search(
+        api_client, departure_airport="LHR", arrival_airport="BKK", limit=2,
+        cursor=first_page["next_cursor"]
+    ).json()
+    first_ids = {flight["id"] for flight in first_page["flights"]}
+    assert first_ids.isdisjoint(flight["id"] for flight in second_page["flights"])
+
+
+def test_search_flights_by_departure_window(api_client: httpx.Client) -> None:
+    """
+    Test that the window is in UTC by default and in the departure airport's time when local.
+    """
+    # AA004 departs at 08:00 UTC, 15:00 in Asia/Bangkok
+    utc_window = {"departure_from": "2024-12-01T07:00:00", "departure_to": "2024-12-01T09:00:00"}
+    local_window = {"departure_from": "2024-12-01T14:00:00", "departure_to": "2024-12-01T16:00:00"}
+
+    flights = search(api_client, arrival_airport="BKK", **utc_window).json()["flights"]
+    assert [flight["id"] for flight in flights] == ["AA004"]
+    assert flights[0]["departure_time"] == "2024-12-01T15:00:00+07:00"
+
+    flights = search(api_client, arrival_airport="BKK", **local_window).json()["flights"]
+    assert flights == []
+
+    flights = search(api_client, arrival_airport="BKK", time_zone="local", **local_window).json()["flights"]
+    assert [flight["id"] for flight in flights] == ["AA004"]
+
+    # A UTC offset makes the bound absolute
+    flights = search(
+        api_client, departure_airport="DMK",
+        departure_from="2024-12-01T14:00:00+07:00", departure_to="2024-12-01T16:00:00+07:00"
+    ).json()["flights"]
+    assert [flight["id"] for flight in flights] == ["AA004"]
+
+
+def test_search_flights_with_invalid_filters(api_client: httpx.Client) -> None:
+    """
+    Test that a search without airport or with an empty window is rejected.
+    """
+    assert_status_code(api_client.get("/flights/search"), 400)
+    assert_status_code(
+        api_client.get("/flights/search", params={
+            "departure_airport": "LHR",
+            "departure_from": "2024-12-02T00:00:00",
+            "departure_to": "2024-12-01T00:00:00",
+        }),
+        400
+    )